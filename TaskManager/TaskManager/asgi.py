@@ -3,6 +3,10 @@ ASGI config for TaskManager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module to use the native async endpoints
+and the task event stream (`/api/async/tasks/events/`), whose open
+connections are coroutines rather than worker threads.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
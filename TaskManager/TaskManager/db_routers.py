@@ -0,0 +1,90 @@
+"""
+Read-replica routing.
+
+Writes always go to the primary (`default`). Reads go to a replica only
+inside `replica_reads()`. TaskViewSet's list and retrieve actions use it,
+and so do the user lookups made during authentication. Everything else,
+including reads made while writing, stays on the primary.
+
+A write pins the affected list scopes (`user:<id>`, or `all` for admins)
+to the primary for `REPLICA_PIN_SECONDS`. During that window the writer
+reads its own writes, and cached list pages are never filled from a
+lagging replica. `invalidate_task_lists` calls `pin_to_primary` for
+every task write path. Pins live in the default cache, which must be
+shared between processes in production.
+
+With `REPLICA_DATABASES` empty, all of this is a no-op.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+# Replica alias chosen for the current request's reads, if any. One alias
+# per request, so all its reads see the same replication position.
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def _pin_key(scope):
+    return f'db:pinned:{scope}'
+
+
+def pin_to_primary(scopes):
+    """Keep reads for `scopes` on the primary for `REPLICA_PIN_SECONDS`."""
+    if not get_replicas():
+        return
+    cache.set_many({_pin_key(scope): True for scope in scopes}, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(scope):
+    return cache.get(_pin_key(scope)) is not None
+
+
+def start_replica_reads(scope):
+    """
+    Route this context's reads to a replica unless `scope` is pinned.
+    Returns a token for `stop_replica_reads`, or None when nothing changed.
+    """
+    replicas = get_replicas()
+    if not replicas or _read_alias.get() is not None or is_pinned(scope):
+        return None
+    return _read_alias.set(random.choice(replicas))
+
+
+def stop_replica_reads(token):
+    if token is not None:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def replica_reads(scope):
+    token = start_replica_reads(scope)
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        databases = {PRIMARY, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,323 @@
+"""
+Request metrics in the Prometheus text format.
+
+`MetricsMiddleware` records, for every request:
+
+- `taskmanager_http_requests_total`: a counter by view, action, method and
+  status code.
+- `taskmanager_http_request_duration_seconds`: a latency histogram by view,
+  action and method.
+- `taskmanager_http_request_db_queries`: a histogram of SQL queries per
+  request, by view and action. It needs `QueryBudgetMiddleware` enabled.
+
+`view` is the dotted path of the view, e.g. `tasks.views.TaskViewSet` or
+`users.views.registration_view`. `action` is the viewset action (`list`,
+`create`...) or, for other views, the lowercased HTTP method. Methods other
+than GET, HEAD, POST, PUT, PATCH, DELETE and OPTIONS are recorded as `other`
+so clients cannot grow the number of series. `metrics_view` serves
+everything at `/metrics`.
+
+Values live in the process and are guarded by a lock. Under a pre-fork
+server (gunicorn, uWSGI) each worker only sees its own requests, so set
+`METRICS['MULTIPROCESS_DIR']`. Each worker then writes its values to its
+own file there every `FLUSH_INTERVAL` seconds, and a scrape adds all the
+files up. A scrape therefore lags up to one interval behind other workers.
+Empty the directory when the server starts, as files of stopped workers are
+kept so their counts are not lost.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 1.0,
+    'TOKEN': None,
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+class Counter:
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def new_value(self):
+        return 0
+
+    def update(self, value, amount):
+        return value + amount
+
+    @staticmethod
+    def merge(value, other):
+        return value + other
+
+    def samples(self, labels, value):
+        yield self.name, labels, value
+
+
+class Histogram:
+    """Fixed buckets; a value holds the count of each bucket (not cumulative), the sum and the count."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def new_value(self):
+        return [0] * (len(self.buckets) + 1) + [0, 0]
+
+    def update(self, value, observed):
+        # The last bucket is +Inf
+        index = next((i for i, bound in enumerate(self.buckets) if observed <= bound), len(self.buckets))
+        value[index] += 1
+        value[-2] += observed
+        value[-1] += 1
+        return value
+
+    @staticmethod
+    def merge(value, other):
+        return [a + b for a, b in zip(value, other)]
+
+    def samples(self, labels, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value):
+            cumulative += count
+            yield f'{self.name}_bucket', labels + (('le', _format_value(bound)),), cumulative
+        yield f'{self.name}_sum', labels, value[-2]
+        yield f'{self.name}_count', labels, value[-1]
+
+
+class Registry:
+    """Thread-safe values of a fixed set of metrics, optionally shared with other processes through files."""
+
+    def __init__(self, metrics):
+        self.metrics = {metric.name: metric for metric in metrics}
+        self._reset()
+        # A forked worker starts from zero rather than from its parent's counts
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._values = {name: {} for name in self.metrics}
+        self._dirty = False
+        self._flusher = None
+        self._file_name = None
+
+    def record(self, name, labels, amount):
+        metric = self.metrics[name]
+        key = tuple(str(labels[label]) for label in metric.labelnames)
+        with self._lock:
+            values = self._values[name]
+            values[key] = metric.update(values.get(key, metric.new_value()), amount)
+            self._dirty = True
+        if self._flusher is None and get_config()['MULTIPROCESS_DIR']:
+            self._start_flusher()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {key: list(value) if isinstance(value, list) else value for key, value in values.items()}
+                for name, values in self._values.items()
+            }
+
+    def collect(self):
+        """Values of this process, or of every process in multiprocess mode."""
+        directory = get_config()['MULTIPROCESS_DIR']
+        if not directory:
+            return self.snapshot()
+        self.flush()
+        totals = {name: {} for name in self.metrics}
+        for path in Path(directory).glob('*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Being replaced, or removed, by its worker
+                continue
+            for name, entries in data.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for labels, value in entries:
+                    key = tuple(labels)
+                    current = totals[name].get(key)
+                    totals[name][key] = value if current is None else metric.merge(current, value)
+        return totals
+
+    def flush(self):
+        """Write this process's values to its file in `MULTIPROCESS_DIR`."""
+        directory = get_config()['MULTIPROCESS_DIR']
+        if not directory:
+            return
+        with self._flush_lock:
+            if self._file_name is None:
+                # Unique per process even when a pid is reused by a new worker
+                self._file_name = f'{os.getpid()}-{time.time_ns()}'
+            self._dirty = False
+            data = {
+                name: [[list(key), value] for key, value in values.items()]
+                for name, values in self.snapshot().items()
+            }
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            tmp = Path(directory) / f'{self._file_name}.tmp'
+            tmp.write_text(json.dumps(data))
+            # Atomic: a concurrent scrape sees the old file or the new one
+            os.replace(tmp, Path(directory) / f'{self._file_name}.json')
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _flush_periodically(self):
+        interval = get_config()['FLUSH_INTERVAL']
+        while True:
+            time.sleep(interval)
+            if self._dirty:
+                self.flush()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        values = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(values[name].items()):
+                labels = tuple(zip(metric.labelnames, key))
+                for sample, sample_labels, sample_value in metric.samples(labels, value):
+                    lines.append(f'{sample}{_format_labels(sample_labels)} {_format_value(sample_value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+REQUESTS = 'taskmanager_http_requests_total'
+DURATION = 'taskmanager_http_request_duration_seconds'
+QUERIES = 'taskmanager_http_request_db_queries'
+
+registry = Registry([
+    Counter(REQUESTS, "Requests served.", ['view', 'action', 'method', 'status']),
+    Histogram(
+        DURATION, "Time to produce the response, in seconds.", ['view', 'action', 'method'],
+        [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    ),
+    Histogram(QUERIES, "SQL queries per request.", ['view', 'action'], [0, 1, 2, 3, 5, 10, 20, 50, 100]),
+])
+
+
+METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+
+def _method_label(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+def _view_label(view_func):
+    # DRF and class-based views, including @api_view functions, expose their class
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    target = view_class or view_func
+    return f'{target.__module__}.{target.__name__}'
+
+
+class MetricsMiddleware:
+    """
+    Record request metrics. Configured by the `METRICS` setting; when
+    disabled the middleware removes itself from the chain at startup. Place
+    it before `QueryBudgetMiddleware` so the query count is known when the
+    request is recorded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_config()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        method = _method_label(request).lower()
+        request._metrics_labels = {
+            'view': _view_label(view_func),
+            'action': getattr(view_func, 'actions', {}).get(method, method),
+        }
+
+    def record(self, request, response, duration):
+        labels = getattr(request, '_metrics_labels', None) or {'view': 'unmatched', 'action': ''}
+        labels = {**labels, 'method': _method_label(request), 'status': response.status_code}
+        registry.record(REQUESTS, labels, 1)
+        registry.record(DURATION, labels, duration)
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            registry.record(QUERIES, labels, stats.count)
+
+
+@require_GET
+def metrics_view(request):
+    config = get_config()
+    if not config['ENABLED']:
+        raise Http404
+    if config['TOKEN']:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        if not constant_time_compare(supplied, config['TOKEN']):
+            return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
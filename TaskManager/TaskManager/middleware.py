@@ -0,0 +1,122 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Stats of the request being served. Context variables follow the request
+# into sync_to_async threads, where async views run their queries.
+_current_stats = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """`execute_wrapper` that counts queries and accumulates their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def _install_wrapper(connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count SQL queries and database time for each request and report them in a
+    `Server-Timing` header; log a warning when a view exceeds its query budget.
+
+    Configured by the `QUERY_BUDGET` setting. A view, view class or
+    ModelAdmin can set its own limit with a `query_budget` attribute, and a
+    viewset one per action with a `query_budgets` dict (e.g.
+    `{'bulk_update': 40}`). When disabled the middleware removes itself from
+    the chain at startup.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'QUERY_BUDGET', {})
+        if not config.get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_queries = config.get('MAX_QUERIES', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Every connection, whichever thread opens it, reports to the
+        # stats of the current request.
+        connection_created.connect(_install_wrapper)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.process_stats(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.process_stats(request, response, stats, time.perf_counter() - start)
+
+    def process_stats(self, request, response, stats, total):
+        request.query_stats = stats
+        response['Server-Timing'] = (
+            f'db;desc="{stats.count} queries";dur={stats.duration * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+        budget = getattr(request, '_query_budget', None) or self.max_queries
+        if stats.count > budget:
+            logger.warning(
+                "%s %s issued %d queries (budget %d, %.1f ms in the database)",
+                request.method, request.path, stats.count, budget, stats.duration * 1000,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF views expose their class as `cls` on the view function, and
+        # viewsets their method-to-action mapping as `actions`. ModelAdmin
+        # views carry their ModelAdmin as `model_admin`.
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'model_admin', None)
+        action = getattr(view_func, 'actions', {}).get(request.method.lower())
+        request._query_budget = (
+            getattr(view_func, 'query_budget', None)
+            or getattr(view_class, 'query_budgets', {}).get(action)
+            or getattr(view_class, 'query_budget', None)
+        )
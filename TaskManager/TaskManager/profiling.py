@@ -0,0 +1,220 @@
+"""
+On-demand request profiling.
+
+`ProfilingMiddleware` runs cProfile around the view for a request that
+carries a valid signed `X-Profile` header (see `make_profile_token`), or
+for a random `SAMPLE_RATE` fraction of requests. Each profile is written to
+`DIRECTORY` as three files sharing one id:
+
+- `<id>.prof`: pstats data, for `python -m pstats` or snakeviz.
+- `<id>.collapsed`: collapsed stacks, for flamegraph.pl or speedscope.
+- `<id>.json`: endpoint, method, path, status and duration.
+
+The directory is a ring buffer. Once it holds more than `MAX_PROFILES`
+profiles, the oldest are deleted. `manage.py profiles` lists and
+summarises them by endpoint.
+
+cProfile only sees the thread it runs in, so only requests served
+synchronously (WSGI, or sync views under `runserver`) are profiled.
+"""
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': 'profiles',
+    'MAX_PROFILES': 200,
+    'TOKEN_MAX_AGE': 3600,
+}
+
+HEADER = 'HTTP_X_PROFILE'
+_SALT = 'TaskManager.profiling'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+def make_profile_token():
+    """Value for the `X-Profile` header; valid for `TOKEN_MAX_AGE` seconds."""
+    return signing.TimestampSigner(salt=_SALT).sign('profile')
+
+
+def check_profile_token(token, max_age):
+    try:
+        return signing.TimestampSigner(salt=_SALT).unsign(token, max_age=max_age) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        # Built-ins: name is e.g. "<built-in method time.sleep>"
+        return name.replace(';', ':')
+    return f'{name} ({os.path.basename(filename)}:{lineno})'.replace(';', ':')
+
+
+def collapsed_stacks(stats, min_seconds=1e-6):
+    """
+    Collapsed stacks (`frame;frame;frame microseconds`) from a
+    `pstats.Stats`. cProfile records caller/callee pairs, not whole stacks,
+    so a function's own time is split across the paths leading to it in
+    proportion to the time each caller spent in it. Paths worth less than
+    `min_seconds` are dropped, which also bounds the walk.
+    """
+    children = {}
+    roots = []
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            children.setdefault(caller, []).append((func, edge_cumulative))
+
+    totals = {}
+
+    def walk(func, path, share, on_path):
+        own = stats.stats[func][2]
+        path = f'{path};{_frame_label(func)}' if path else _frame_label(func)
+        totals[path] = totals.get(path, 0) + own * share
+        for child, edge_cumulative in children.get(func, ()):
+            child_cumulative = stats.stats[child][3]
+            # Recursion shows up as a cycle; its time is already counted once
+            if child in on_path or share * edge_cumulative < min_seconds:
+                continue
+            walk(child, path, share * min(edge_cumulative / child_cumulative, 1), on_path | {child})
+
+    for root in roots:
+        walk(root, '', 1.0, frozenset([root]))
+    return [f'{stack} {round(seconds * 1e6)}' for stack, seconds in totals.items() if seconds >= min_seconds]
+
+
+class ProfileStore:
+    """The on-disk ring buffer of captured profiles."""
+
+    def __init__(self, directory=None, max_profiles=None):
+        config = get_config()
+        self.directory = Path(directory or config['DIRECTORY'])
+        self.max_profiles = max_profiles or config['MAX_PROFILES']
+
+    def save(self, profiler, meta):
+        """Write one profile and trim the buffer; returns its id."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Sortable by capture time, unique across processes
+        profile_id = f'{time.time_ns()}-{os.getpid()}'
+        base = self.directory / profile_id
+        profiler.dump_stats(f'{base}.prof')
+        stats = pstats.Stats(f'{base}.prof')
+        (self.directory / f'{profile_id}.collapsed').write_text('\n'.join(collapsed_stacks(stats)) + '\n')
+        # The metadata file is written last: a profile is listed once it is complete
+        (self.directory / f'{profile_id}.json').write_text(json.dumps({'id': profile_id, **meta}))
+        self.trim()
+        return profile_id
+
+    def ids(self):
+        """Ids of the complete profiles, oldest first."""
+        if not self.directory.is_dir():
+            return []
+        return sorted(path.stem for path in self.directory.glob('*.json'))
+
+    def load(self, profile_id):
+        return json.loads((self.directory / f'{profile_id}.json').read_text())
+
+    def profiles(self):
+        """Metadata of every profile, oldest first."""
+        for profile_id in self.ids():
+            try:
+                yield self.load(profile_id)
+            except FileNotFoundError:
+                # Trimmed since it was listed
+                continue
+
+    def path(self, profile_id, suffix):
+        return self.directory / f'{profile_id}{suffix}'
+
+    def trim(self):
+        ids = self.ids()
+        for profile_id in ids[:max(len(ids) - self.max_profiles, 0)]:
+            for suffix in ('.json', '.prof', '.collapsed'):
+                # Another process may be trimming the same profile
+                self.path(profile_id, suffix).unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Profile the view of requests that ask for it (signed `X-Profile` header)
+    or are sampled. Configured by the `PROFILING` setting; when disabled the
+    middleware removes itself from the chain at startup. Place it last in
+    MIDDLEWARE so profiles cover the view rather than other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config['SAMPLE_RATE']
+        self.token_max_age = config['TOKEN_MAX_AGE']
+        self.store = ProfileStore()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process
+            logger.warning("Skipped profiling %s %s: another profile is running", request.method, request.path)
+            return self.get_response(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        meta = {
+            'endpoint': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'captured_at': time.time(),
+        }
+        try:
+            response['X-Profile-Id'] = self.store.save(profiler, meta)
+        except OSError:
+            logger.exception("Could not save the profile of %s %s", request.method, request.path)
+        return response
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def should_profile(self, request):
+        token = request.META.get(HEADER)
+        if token:
+            return check_profile_token(token, self.token_max_age)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
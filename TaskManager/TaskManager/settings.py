@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,8 +54,41 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'TaskManager.metrics.MetricsMiddleware',
+    'TaskManager.middleware.QueryBudgetMiddleware',
+    'TaskManager.profiling.ProfilingMiddleware',
 ]
 
+# Per-request SQL query counting, reported in the Server-Timing header.
+# Requests issuing more than MAX_QUERIES queries are logged as warnings.
+QUERY_BUDGET = {
+    'ENABLED': True,
+    'MAX_QUERIES': 10,
+}
+
+# Prometheus metrics at /metrics (see TaskManager/metrics.py). Under a
+# pre-fork server set MULTIPROCESS_DIR to a directory shared by the workers
+# and emptied at startup; a scrape then adds up the values of all workers.
+# With TOKEN set, scrapes need an `Authorization: Bearer <TOKEN>` header.
+METRICS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': os.environ.get('TASKMANAGER_METRICS_DIR'),
+    'FLUSH_INTERVAL': 1.0,
+    'TOKEN': os.environ.get('TASKMANAGER_METRICS_TOKEN'),
+}
+
+# Request profiling (see TaskManager/profiling.py): requests with a signed
+# X-Profile header (manage.py profiles --token), plus a SAMPLE_RATE fraction
+# of all requests, are profiled into a ring buffer of MAX_PROFILES files.
+# Off unless TASKMANAGER_PROFILING=1.
+PROFILING = {
+    'ENABLED': os.environ.get('TASKMANAGER_PROFILING') == '1',
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'MAX_PROFILES': 200,
+    'TOKEN_MAX_AGE': 3600,
+}
+
 ROOT_URLCONF = 'TaskManager.urls'
 
 TEMPLATES = [
@@ -85,6 +120,46 @@ DATABASES = {
     }
 }
 
+# Read replicas: aliases in DATABASES that TaskViewSet list/retrieve and
+# authentication user lookups read from. After a write, the affected users'
+# reads stay on the primary for REPLICA_PIN_SECONDS.
+DATABASE_ROUTERS = ['TaskManager.db_routers.ReplicaRouter']
+REPLICA_DATABASES = []
+REPLICA_PIN_SECONDS = 5
+
+# Local stand-in for a replica: a second SQLite file, e.g. a copy of db.sqlite3.
+if os.environ.get('TASKMANAGER_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['TASKMANAGER_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES = ['replica']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Point 'task_lists' at a shared backend (Redis, Memcached) in production so
+# invalidations are seen by every worker. LocMemCache evicts least recently
+# used entries once MAX_ENTRIES is reached.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'task_lists': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-lists',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+TASK_LIST_CACHE_ALIAS = 'task_lists'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -131,8 +206,55 @@ AUTH_USER_MODEL = 'users.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication'
     ],
+    # orjson is used when installed; see TaskManager/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'TaskManager.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'TaskManager.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'TEST_REQUEST_DEFAULT_FORMAT': 'json'
-}
\ No newline at end of file
+}
+
+# application/msgpack for internal services, when msgpack is installed
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('TaskManager.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('TaskManager.renderers.MessagePackParser')
+
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.RoleTokenObtainPairSerializer',
+}
+
+# Push channel (/api/async/tasks/events/); see tasks/events.py. The
+# in-memory broker only reaches clients connected to the same process.
+TASK_EVENTS = {
+    'BACKEND': 'tasks.events.InMemoryBroker',
+    'MAX_BUFFER': 100,
+    'MAX_CONNECTIONS_PER_USER': 5,
+    'KEEPALIVE': 15,
+}
+
+# Days the changes feed keeps tombstones of deleted, archived and reassigned
+# tasks; older sync tokens get 410 Gone (see tasks/tombstones.py).
+TASK_TOMBSTONE_RETENTION_DAYS = 30
+
+# manage.py sweep_overdue; NOTIFIER is a class with a notify(task) method.
+# A failed notification is retried by later sweeps up to MAX_ATTEMPTS times,
+# for at most MAX_FAILED tasks at once.
+OVERDUE_SWEEP = {
+    'NOTIFIER': 'tasks.sweeper.LoggingNotifier',
+    'WORKERS': 4,
+    'BATCH_SIZE': 500,
+    'MAX_ATTEMPTS': 5,
+    'MAX_FAILED': 10000,
+}
+
+# Seconds between database re-checks of a JWT user's is_active/role (per
+# process); 0 trusts the token claims until they expire.
+JWT_USER_CHECK_TTL = 30
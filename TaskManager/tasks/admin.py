@@ -1,6 +1,22 @@
-from django.contrib import admin
+from collections import Counter
+from functools import partial
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.admin import UserAdmin
-from .models import Task
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .archive import restore_archived_tasks
+from .cache import invalidate_task_lists
+from .events import publish_task_events
+from .models import ArchivedTask, Task
+from .serializers import TaskSerializer
+from .stats import apply_summary_deltas
+from .tombstones import record_tombstones
 from users.models import CustomUser
 
 class CustomUserAdmin(UserAdmin):
@@ -28,4 +44,174 @@ class CustomUserAdmin(UserAdmin):
     )
 
 admin.site.register(CustomUser, CustomUserAdmin)
-admin.site.register(Task)
\ No newline at end of file
+
+
+def estimate_row_count(model, using='default'):
+    """
+    The planner's row estimate for `model`'s table: `reltuples` on
+    PostgreSQL, `sqlite_stat1` on SQLite. None when the table was never
+    analyzed or the backend keeps no such statistic.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            row = cursor.fetchone()
+            # -1 (PostgreSQL 14+) or 0 until the first ANALYZE
+            return row[0] if row and row[0] > 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            # The first number of each entry is the row count of the table or
+            # index; partial indexes cover fewer rows, so take the largest
+            counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+            return max(counts, default=None) or None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never runs a full COUNT(*) over a large table.
+
+    Unfiltered lists use the database's row estimate once it exceeds
+    `count_limit`. Filtered lists, and tables without statistics, count at
+    most `count_limit` rows, so pages past that limit are not linked.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        return queryset.order_by()[:self.count_limit].count()
+
+
+class TaskActionForm(ActionForm):
+    reassign_to = forms.IntegerField(required=False, min_value=1, label="Reassign to user id")
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task_name', 'user', 'status', 'due_date', 'is_active', 'updated_at']
+    list_filter = ['status', 'is_active']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    # Newest first walks the primary key instead of sorting the table
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = TaskActionForm
+    actions = ['complete', 'deactivate', 'reassign']
+    # Sessions, permissions and messages come on top of the page's own queries
+    query_budget = 30
+    # Tasks serialized per round of live update events after an action
+    event_batch_size = 500
+
+    @admin.action(description="Mark selected tasks as completed")
+    def complete(self, request, queryset):
+        updated = self._update_tasks(queryset.exclude(status='completed'), status='completed')
+        self.message_user(request, f"{updated} task(s) marked as completed.")
+
+    @admin.action(description="Deactivate selected tasks")
+    def deactivate(self, request, queryset):
+        updated = self._update_tasks(queryset.filter(is_active=True), is_active=False)
+        self.message_user(request, f"{updated} task(s) deactivated.")
+
+    @admin.action(description="Reassign selected tasks to the user id given")
+    def reassign(self, request, queryset):
+        form = TaskActionForm(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        user_id = form.cleaned_data['reassign_to'] if form.is_valid() else None
+        if user_id is None or not CustomUser.objects.filter(pk=user_id).exists():
+            self.message_user(request, "Enter the id of an existing user to reassign tasks to.", messages.ERROR)
+            return
+        updated = self._update_tasks(queryset.exclude(user_id=user_id), user_id=user_id)
+        self.message_user(request, f"{updated} task(s) reassigned to user {user_id}.")
+
+    def save_model(self, request, obj, form, change):
+        previous_user_id = form.initial.get('user') if change and 'user' in form.changed_data else None
+        super().save_model(request, obj, form, change)
+        previous_owners = {}
+        if previous_user_id is not None:
+            # The save signal only knows the new owner
+            invalidate_task_lists([previous_user_id])
+            record_tombstones([(obj.pk, previous_user_id)], reassigned=True)
+            previous_owners[obj.pk] = previous_user_id
+        publish_task_events('task.updated' if change else 'task.created', [TaskSerializer(obj).data], previous_owners)
+
+    def delete_model(self, request, obj):
+        task = {"id": obj.pk, "user": obj.user_id}
+        super().delete_model(request, obj)
+        publish_task_events('task.deactivated', [task])
+
+    def delete_queryset(self, request, queryset):
+        tasks = [{"id": pk, "user": user_id} for pk, user_id in queryset.values_list('id', 'user_id')]
+        super().delete_queryset(request, queryset)
+        publish_task_events('task.deactivated', tasks)
+
+    def _update_tasks(self, queryset, **changes):
+        """
+        Apply `changes` to the whole selection with a single UPDATE, which
+        sends no Task signals, and keep the summary, list caches, changes
+        feed and live update events in step.
+        """
+        with transaction.atomic():
+            # Locked, so the events and deltas below describe the rows updated
+            owners = dict(queryset.order_by().select_for_update().values_list('id', 'user_id'))
+            queryset = Task.objects.filter(pk__in=owners)
+            # Summary deltas come from one GROUP BY, not from loading the rows
+            buckets = list(
+                queryset.values_list('user_id', 'due_date', 'status', 'is_active').annotate(total=Count('id'))
+            )
+            if 'user_id' in changes:
+                # The previous owners' changes feeds need a tombstone per task
+                record_tombstones(owners.items(), reassigned=True)
+            updated = queryset.update(**changes, updated_at=timezone.now())
+            deltas = Counter()
+            for user_id, due_date, status, is_active, total in buckets:
+                deltas[(user_id, due_date, status, is_active)] -= total
+                new_key = (
+                    changes.get('user_id', user_id), due_date,
+                    changes.get('status', status), changes.get('is_active', is_active),
+                )
+                deltas[new_key] += total
+            apply_summary_deltas(deltas)
+            invalidate_task_lists({bucket[0] for bucket in buckets} | {changes.get('user_id')})
+            # Serializing the selection would hold the locks; it waits for the commit
+            transaction.on_commit(partial(self._publish_updates, owners, changes))
+        return updated
+
+    def _publish_updates(self, owners, changes):
+        """Send the events of `_update_tasks`, `event_batch_size` tasks at a time."""
+        ids = sorted(owners)
+        previous_owners = owners if 'user_id' in changes else None
+        for start in range(0, len(ids), self.event_batch_size):
+            batch = ids[start:start + self.event_batch_size]
+            if changes.get('is_active') is False:
+                publish_task_events('task.deactivated', [{"id": pk, "user": owners[pk]} for pk in batch])
+            else:
+                tasks = Task.objects.filter(pk__in=batch).order_by('id')
+                publish_task_events('task.updated', TaskSerializer(tasks, many=True).data, previous_owners)
+
+admin.site.register(Task, TaskAdmin)
+
+
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    list_display = ['task_name', 'user', 'status', 'due_date', 'archived_at']
+    list_filter = ['status']
+    search_fields = ['task_name']
+    raw_id_fields = ['user']
+    list_select_related = ['user']
+    actions = ['restore']
+
+    @admin.action(description="Restore selected tasks")
+    def restore(self, request, queryset):
+        restored = restore_archived_tasks(queryset)
+        self.message_user(request, f"{len(restored)} task(s) restored.")
+
+admin.site.register(ArchivedTask, ArchivedTaskAdmin)
@@ -0,0 +1,80 @@
+"""
+Archive tier for soft-deleted tasks.
+
+`archive_inactive_tasks` moves inactive tasks that were last updated before
+a cutoff into `ArchivedTask`. It works in batches, and each batch runs in
+its own short transaction, so the tasks table and its indexes only carry
+rows the API can still return. `restore_archived_tasks` moves archived
+tasks back under their original ids.
+
+Neither function goes through Task signals. Both apply their summary
+deltas and list cache invalidation in bulk, like the other bulk paths, and
+archiving records the changes feed tombstones itself. Restoring publishes
+a `task.created` event for each task restored active.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from .cache import invalidate_task_lists
+from .events import publish_task_events
+from .models import ArchivedTask, Task
+from .serializers import TaskSerializer
+from .stats import apply_summary_deltas, created_deltas
+from .tombstones import record_tombstones
+
+ARCHIVED_FIELDS = ['id', 'user_id', 'task_name', 'description', 'status', 'due_date', 'created_at', 'updated_at']
+
+
+def archive_inactive_tasks(older_than, batch_size=1000):
+    """
+    Move tasks inactive and untouched since `older_than` into the archive;
+    yields the number of tasks moved by each batch.
+    """
+    while True:
+        with transaction.atomic():
+            # Locked, so a task reactivated meanwhile is not archived
+            rows = list(
+                Task.objects.select_for_update()
+                .filter(is_active=False, updated_at__lt=older_than)
+                .order_by('updated_at', 'id')
+                .values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return
+            ArchivedTask.objects.bulk_create([ArchivedTask(**row) for row in rows])
+            # A raw DELETE: sending post_delete row by row would cost more
+            # than the move itself. The summary, tombstones and list cache
+            # are updated below, once per batch.
+            Task.objects.filter(pk__in=[row['id'] for row in rows])._raw_delete(Task.objects.db)
+            deltas = Counter()
+            for row in rows:
+                deltas[(row['user_id'], row['due_date'], row['status'], False)] -= 1
+            apply_summary_deltas(deltas)
+            record_tombstones((row['id'], row['user_id']) for row in rows)
+            invalidate_task_lists({row['user_id'] for row in rows})
+        yield len(rows)
+
+
+def restore_archived_tasks(archived_tasks, reactivate=True):
+    """
+    Move `archived_tasks` (a queryset) back into the tasks table, active
+    again unless `reactivate` is False; returns the restored tasks.
+    """
+    with transaction.atomic():
+        rows = list(archived_tasks.select_for_update().values(*ARCHIVED_FIELDS))
+        if not rows:
+            return []
+        tasks = [Task(**row, is_active=reactivate) for row in rows]
+        # bulk_create applies auto_now_add; put the original creation time back
+        Task.objects.bulk_create(tasks)
+        for task, row in zip(tasks, rows):
+            task.created_at = row['created_at']
+        Task.objects.bulk_update(tasks, ['created_at'])
+        ArchivedTask.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+
+        apply_summary_deltas(created_deltas(tasks))
+        invalidate_task_lists({task.user_id for task in tasks})
+        if reactivate:
+            publish_task_events('task.created', TaskSerializer(tasks, many=True).data)
+    return tasks
@@ -0,0 +1,271 @@
+"""
+Native async versions of the TaskViewSet endpoints, served under
+`/api/async/tasks/`.
+
+DRF views are synchronous, so under ASGI every request holds a worker
+thread. These views use Django's async ORM end to end. Authentication
+trusts the token claims, and the database is only touched for the
+occasional `JWT_USER_CHECK_TTL` re-check. A slow client therefore costs
+a coroutine, not a thread.
+
+Responses match TaskViewSet, including messages and status codes.
+
+`TaskEventStreamView` pushes task change events as server-sent events; it
+needs ASGI, since each open stream is a long-lived coroutine.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from users.authentication import ClaimsJWTAuthentication
+from .cache import invalidate_task_lists
+from .events import Overflow, TooManyConnections, get_broker, get_config, publish_task_events
+from .models import Task, CustomUser
+from .pagination import TaskPagination
+from .serializers import TaskSerializer
+from .tombstones import arecord_tombstones
+from .views import TaskFilter
+
+
+def _detail(message, status):
+    return JsonResponse({"detail": message}, status=status)
+
+
+class AsyncTaskView(View):
+    """Authenticates with JWT and scopes tasks by role, like TaskViewSet."""
+    authentication = ClaimsJWTAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            result = await self.authenticate(request)
+        except APIException as exc:
+            return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+        if result is None:
+            return _detail("Authentication credentials were not provided.", 401)
+        request.user = result[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def authenticate(self, request):
+        return await self.authentication.aauthenticate(request)
+
+    def get_queryset(self):
+        """Admin sees all tasks; regular users see only their tasks."""
+        user = self.request.user
+        if user.role == 'admin':
+            return Task.objects.filter(is_active=True)
+        return Task.objects.filter(user_id=user.id, is_active=True)
+
+    def parse_body(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError as exc:
+            raise ValueError(f"JSON parse error - {exc}")
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object.")
+        return data
+
+    async def get_object(self, pk):
+        try:
+            return await self.get_queryset().aget(pk=pk)
+        except Task.DoesNotExist:
+            return None
+
+
+class TaskListAsyncView(AsyncTaskView):
+
+    async def get(self, request):
+        filterset = TaskFilter(request.GET, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            return JsonResponse(filterset.errors, status=400)
+        queryset = filterset.qs
+
+        page_size = self._get_page_size(request)
+        try:
+            page_number = int(request.GET.get('page', 1))
+        except ValueError:
+            return _detail("Invalid page.", 404)
+        count = await queryset.acount()
+        last_page = max(1, -(-count // page_size))
+        if not 1 <= page_number <= last_page:
+            return _detail("Invalid page.", 404)
+
+        offset = (page_number - 1) * page_size
+        tasks = [task async for task in queryset[offset:offset + page_size]]
+        url = request.build_absolute_uri()
+        return JsonResponse({
+            "count": count,
+            "next": replace_query_param(url, 'page', page_number + 1) if page_number < last_page else None,
+            "previous": self._previous_link(url, page_number),
+            "results": TaskSerializer(tasks, many=True).data,
+        })
+
+    async def post(self, request):
+        """Admin can create tasks for any user; regular users only for themselves."""
+        try:
+            data = self.parse_body()
+        except ValueError as exc:
+            return _detail(str(exc), 400)
+        serializer = TaskSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        user = request.user
+        user_id = user.id
+        if user.role == 'admin':
+            # Admin can specify the user to assign the task to
+            if data.get("user"):
+                if not await CustomUser.objects.filter(id=data["user"]).aexists():
+                    return _detail(f"User with id {data['user']} does not exist.", 400)
+                user_id = data["user"]
+        elif "user" in data and str(data["user"]) != str(user.id):
+            # Regular users cannot specify another user in the payload
+            return _detail("You are not authorized to create tasks for another user.", 400)
+
+        task = await Task.objects.acreate(**serializer.validated_data, user_id=user_id)
+        data = TaskSerializer(task).data
+        await sync_to_async(publish_task_events)('task.created', [data])
+        return JsonResponse({"detail": "Task created successfully.", "task": data}, status=201)
+
+    def _get_page_size(self, request):
+        try:
+            page_size = int(request.GET[TaskPagination.page_size_query_param])
+        except (KeyError, ValueError):
+            return TaskPagination.page_size
+        if page_size <= 0:
+            return TaskPagination.page_size
+        return min(page_size, TaskPagination.max_page_size)
+
+    def _previous_link(self, url, page_number):
+        if page_number <= 1:
+            return None
+        if page_number == 2:
+            return remove_query_param(url, 'page')
+        return replace_query_param(url, 'page', page_number - 1)
+
+
+class TaskDetailAsyncView(AsyncTaskView):
+
+    async def get(self, request, pk):
+        """Admin can view any task; regular users can view only their tasks."""
+        try:
+            task = await Task.objects.aget(pk=pk, is_active=True)
+        except Task.DoesNotExist:
+            return _detail("Task not found or it is no longer active.", 404)
+
+        if request.user.role != 'admin' and task.user_id != request.user.id:
+            return _detail("You are not authorized to view this task.", 403)
+
+        return JsonResponse({"detail": "Task retrieved successfully.", "task": TaskSerializer(task).data})
+
+    async def put(self, request, pk):
+        return await self._update(request, pk, partial=False)
+
+    async def patch(self, request, pk):
+        return await self._update(request, pk, partial=True)
+
+    async def delete(self, request, pk):
+        """Admin can delete any task; regular users can delete only their tasks."""
+        task = await self.get_object(pk)
+        if task is None:
+            return _detail("Task not found or it is no longer active.", 404)
+
+        # Perform soft delete (mark as inactive)
+        task.is_active = False
+        await task.asave()
+        await sync_to_async(publish_task_events)('task.deactivated', [{"id": task.pk, "user": task.user_id}])
+        return _detail("Task marked as inactive.", 204)
+
+    async def _update(self, request, pk, partial):
+        """Allow regular users to update only their own tasks, and admins to reassign tasks."""
+        task = await self.get_object(pk)
+        if task is None:
+            return _detail("No Task matches the given query.", 404)
+        previous_user_id = task.user_id
+
+        try:
+            data = self.parse_body()
+        except ValueError as exc:
+            return _detail(str(exc), 400)
+        serializer = TaskSerializer(task, data=data, partial=partial)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        if request.user.role == 'admin' and data.get('user'):
+            # Admin can update the `user` field to reassign the task
+            new_user_pk = await CustomUser.objects.filter(id=data['user']).values_list('id', flat=True).afirst()
+            if new_user_pk is None:
+                return _detail(f"User with id {data['user']} does not exist.", 400)
+            task.user_id = new_user_pk
+
+        for attr, value in serializer.validated_data.items():
+            setattr(task, attr, value)
+        await task.asave()
+        previous_owners = {}
+        if task.user_id != previous_user_id:
+            # The save signal only knows the new owner
+            invalidate_task_lists([previous_user_id])
+            await arecord_tombstones([(task.pk, previous_user_id)], reassigned=True)
+            previous_owners[task.pk] = previous_user_id
+        data = TaskSerializer(task).data
+        await sync_to_async(publish_task_events)('task.updated', [data], previous_owners)
+
+        return JsonResponse({"detail": "Task updated successfully.", "task": data})
+
+
+class TaskEventStreamView(AsyncTaskView):
+    """
+    Server-sent events for changes to the caller's tasks (every task for
+    admins): `task.created`, `task.updated`, `task.deactivated`, and a final
+    `overflow` when the client fell too far behind.
+
+    EventSource cannot send headers, so the access token may also be given
+    as `?token=`. Prefer the header where possible, since URLs end up in logs.
+    """
+
+    async def authenticate(self, request):
+        raw_token = request.GET.get('token')
+        if self.authentication.get_header(request) is not None or not raw_token:
+            return await super().authenticate(request)
+        validated_token = self.authentication.get_validated_token(raw_token)
+        return await self.authentication.aget_user(validated_token), validated_token
+
+    async def get(self, request):
+        broker = get_broker()
+        try:
+            subscription = broker.subscribe(request.user.id, is_admin=request.user.role == 'admin')
+        except TooManyConnections:
+            return _detail("Too many open event streams.", 429)
+
+        response = StreamingHttpResponse(
+            self.stream(subscription, get_config()['KEEPALIVE']), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        # Also runs when the stream is never started, e.g. the client left early
+        response._resource_closers.append(lambda: broker.unsubscribe(subscription))
+        return response
+
+    async def stream(self, subscription, keepalive):
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from timing the connection out
+                    yield ': keepalive\n\n'
+                    continue
+                except Overflow:
+                    yield 'event: overflow\ndata: {}\n\n'
+                    return
+                data = json.dumps(event['task'], cls=DjangoJSONEncoder)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            get_broker().unsubscribe(subscription)
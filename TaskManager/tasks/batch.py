@@ -0,0 +1,137 @@
+"""
+Batch endpoint: many API calls in one round trip.
+
+`BatchView` authenticates the batch request once and runs each operation
+in-process as the same user, in order. Operations are dispatched through
+the URL resolver to the DRF views of the `tasks` and `users` apps. Their
+response data is returned as is, without being rendered and parsed again.
+
+With `"atomic": true` the operations run in one transaction. The first
+operation answered with a 4xx or 5xx status rolls it back, and the
+operations after it are not run.
+
+Sub-requests skip the middleware chain, so they do not show up in the
+request metrics or profiles; the batch request itself does.
+"""
+import io
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .serializers import BatchSerializer
+
+logger = logging.getLogger(__name__)
+
+BATCH_APPS = {'tasks', 'users'}
+
+# Request headers that describe the batch request itself, not its operations
+_REQUEST_ONLY_META = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_AUTHORIZATION', 'HTTP_COOKIE', 'wsgi.input')
+
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_operations = 50
+    # Roughly ten queries per operation
+    query_budget = 500
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data, max_operations=self.max_operations)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        operations = serializer.validated_data['operations']
+
+        if not serializer.validated_data['atomic']:
+            results = [self.run_operation(request, operation) for operation in operations]
+            return Response(
+                {"detail": f"{len(results)} operation(s) run.", "results": results},
+                status=status.HTTP_200_OK,
+            )
+
+        results = []
+        with transaction.atomic():
+            for index, operation in enumerate(operations):
+                result = self.run_operation(request, operation)
+                results.append(result)
+                if result["status"] >= 400:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"detail": f"Operation {index} failed; no changes were made.", "results": results},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+        return Response(
+            {"detail": f"{len(results)} operation(s) run.", "results": results},
+            status=status.HTTP_200_OK,
+        )
+
+    def run_operation(self, request, operation):
+        """Dispatch one operation as `request.user`; returns its `{"status", "body"}`."""
+        url = urlsplit(operation['path'])
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return {"status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+
+        view_class = getattr(match.func, 'cls', None)
+        if (
+            view_class is None
+            or not issubclass(view_class, APIView)
+            or issubclass(view_class, BatchView)
+            or view_class.__module__.split('.')[0] not in BATCH_APPS
+        ):
+            return {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "body": {"detail": f"{url.path} cannot be called in a batch."},
+            }
+
+        sub_request = self.build_request(request, operation, url, match)
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception:
+            # DRF turns API errors into responses; anything reaching here is a bug
+            if transaction.get_connection().in_atomic_block:
+                raise
+            logger.exception("Batch operation %s %s failed", operation['method'], url.path)
+            return {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": {"detail": "Internal server error."}}
+
+        if getattr(response, 'streaming', False):
+            return {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "body": {"detail": "Streamed responses are not available in a batch."},
+            }
+        return {"status": response.status_code, "body": getattr(response, 'data', None)}
+
+    def build_request(self, request, operation, url, match):
+        outer = request._request
+        body = json.dumps(operation['body']).encode() if 'body' in operation else b''
+
+        sub_request = HttpRequest()
+        sub_request.method = operation['method']
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.META = {key: value for key, value in outer.META.items() if key not in _REQUEST_ONLY_META}
+        # Conditional headers of the batch request do not apply to its operations
+        for key in [key for key in sub_request.META if key.startswith('HTTP_IF_')]:
+            del sub_request.META[key]
+        sub_request.META.update({
+            'REQUEST_METHOD': operation['method'],
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'HTTP_ACCEPT': 'application/json',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+        })
+        sub_request.GET = QueryDict(url.query)
+        sub_request._stream = io.BytesIO(body)
+        sub_request._read_started = False
+        sub_request.resolver_match = match
+        # Reuse the batch request's authentication instead of running it again
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
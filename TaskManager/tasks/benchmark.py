@@ -0,0 +1,158 @@
+"""
+In-process load benchmark for the task API.
+
+Requests go through the full Django stack (middleware, authentication,
+serialization) via the test client, but without a network socket, so the
+numbers isolate application and database cost.
+
+Each request commits as it would in production, so on-commit work (cache
+invalidation, live update events) is part of the timings. The tasks the
+benchmark creates are deleted, with their tombstones, once it finishes;
+run it against a disposable database all the same, as other clients see
+them meanwhile.
+"""
+import math
+import random
+import subprocess
+import time
+from datetime import date, timedelta
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from users.tokens import RoleRefreshToken
+from .cache import get_list_cache
+from .models import Task, TaskTombstone
+
+SCENARIOS = ['list', 'filtered_list', 'retrieve', 'create', 'update', 'destroy']
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class TaskBenchmark:
+    """Time each TaskViewSet endpoint as a given user; `run()` returns a JSON-ready report."""
+
+    def __init__(self, user, iterations=100, warmup=5, clear_cache=False, seed=None):
+        self.user = user
+        self.iterations = iterations
+        self.warmup = warmup
+        self.clear_cache = clear_cache
+        self.rng = random.Random(seed)
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        self.timings = {name: [] for name in SCENARIOS}
+        self.errors = {name: 0 for name in SCENARIOS}
+        self.created_ids = []
+
+    def run(self):
+        scoped = Task.objects.filter(is_active=True)
+        if self.user.role != 'admin':
+            scoped = scoped.filter(user_id=self.user.id)
+        self.task_ids = list(scoped.values_list('id', flat=True)[:1000])
+        if not self.task_ids:
+            raise ValueError(f"User {self.user.username} has no active tasks to benchmark against.")
+
+        # The test client's default host is not in ALLOWED_HOSTS outside tests
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for _ in range(self.warmup):
+                    self._iteration(record=False)
+                for _ in range(self.iterations):
+                    self._iteration(record=True)
+        finally:
+            self.cleanup()
+
+        return self.report()
+
+    def _iteration(self, record):
+        if self.clear_cache:
+            get_list_cache().clear()
+        page = self.rng.randint(1, 5)
+        due_after = date.today() - timedelta(days=self.rng.randint(0, 60))
+
+        self._call('list', record, 'get', f'/api/tasks/?page={page}')
+        self._call('filtered_list', record, 'get',
+                   f'/api/tasks/?status=pending&due_date_after={due_after.isoformat()}')
+        self._call('retrieve', record, 'get', f'/api/tasks/{self.rng.choice(self.task_ids)}/')
+
+        response = self._call('create', record, 'post', '/api/tasks/', {
+            'task_name': 'Benchmark task',
+            'description': 'Created by benchmark_tasks',
+            'due_date': date.today().isoformat(),
+        })
+        if response.status_code != 201:
+            return
+        task_id = response.json()['task']['id']
+        self.created_ids.append(task_id)
+        self._call('update', record, 'patch', f'/api/tasks/{task_id}/', {'status': 'in_progress'})
+        self._call('destroy', record, 'delete', f'/api/tasks/{task_id}/')
+
+    def cleanup(self):
+        """Delete the tasks created by the benchmark, so repeated runs see the same data."""
+        Task.objects.filter(pk__in=self.created_ids).delete()
+        TaskTombstone.objects.filter(task_id__in=self.created_ids).delete()
+        self.created_ids = []
+
+    def _call(self, name, record, method, path, data=None):
+        start = time.perf_counter()
+        if data is None:
+            response = getattr(self.client, method)(path)
+        else:
+            response = getattr(self.client, method)(path, data, content_type='application/json')
+        elapsed = time.perf_counter() - start
+        if record:
+            self.timings[name].append(elapsed)
+            if response.status_code >= 400:
+                self.errors[name] += 1
+        return response
+
+    def report(self):
+        results = {}
+        for name in SCENARIOS:
+            timings = sorted(self.timings[name])
+            total = sum(timings)
+            results[name] = {
+                'requests': len(timings),
+                'errors': self.errors[name],
+                'mean_ms': round(total / len(timings) * 1000, 3) if timings else None,
+                'p50_ms': _ms(percentile(timings, 0.50)),
+                'p95_ms': _ms(percentile(timings, 0.95)),
+                'p99_ms': _ms(percentile(timings, 0.99)),
+                'throughput_rps': round(len(timings) / total, 1) if total else None,
+            }
+        return {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'commit': _git_commit(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'user': self.user.username,
+                'role': self.user.role,
+                'iterations': self.iterations,
+                'list_cache_cleared': self.clear_cache,
+                'sampled_task_ids': len(self.task_ids),
+            },
+            'results': results,
+        }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
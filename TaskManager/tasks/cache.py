@@ -0,0 +1,90 @@
+"""
+Versioned cache for task list responses.
+
+Each list scope (one per regular user, plus a shared scope for admins, who
+see every task) has a version counter stored in the cache. Cached pages are
+keyed on the current version, so invalidating a scope is a single `incr`:
+stale pages are never read again and age out through the backend's LRU
+eviction and timeout.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from TaskManager.db_routers import pin_to_primary
+
+ADMIN_SCOPE = 'all'
+
+
+def get_list_cache():
+    return caches[settings.TASK_LIST_CACHE_ALIAS]
+
+
+def get_scope(user):
+    """Admins share one scope since they all see the same tasks."""
+    if user.role == 'admin':
+        return ADMIN_SCOPE
+    return f'user:{user.id}'
+
+
+def _version_key(scope):
+    return f'tasks:list-version:{scope}'
+
+
+def get_version(scope):
+    cache = get_list_cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1: if the counter itself is evicted,
+        # a restarted counter must not collide with versions of pages that
+        # are still cached.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(scope):
+    cache = get_list_cache()
+    key = _version_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_list_cache_key(request, version=None):
+    """
+    Cache key for one list page: scope version, host (links are absolute)
+    and query string. Pass `version` when the caller already read it.
+    """
+    scope = get_scope(request.user)
+    if version is None:
+        version = get_version(scope)
+    query = sorted(request.query_params.lists())
+    digest = hashlib.md5(repr((request.get_host(), query)).encode(), usedforsecurity=False).hexdigest()
+    return f'tasks:list:{scope}:{version}:{digest}'
+
+
+def invalidate_task_lists(user_ids):
+    """
+    Drop cached list pages of the given users and of admins, and keep their
+    reads on the primary database for a while (see TaskManager.db_routers).
+
+    The bump is repeated once the surrounding transaction commits, so a
+    request that re-cached a page from pre-commit data in between is
+    invalidated as well.
+    """
+    scopes = {ADMIN_SCOPE} | {f'user:{user_id}' for user_id in user_ids if user_id is not None}
+
+    def bump():
+        for scope in scopes:
+            _bump_version(scope)
+        pin_to_primary(scopes)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
@@ -0,0 +1,47 @@
+"""
+ETag and Last-Modified validators for task responses.
+
+A task's validators come from its `updated_at`. A list's ETag comes from
+the version of the user's list cache scope (see tasks.cache), which every
+task write bumps, so it costs no query. Lists have no Last-Modified, as the
+version is a counter rather than a time. Both ETags also cover the query
+string and the Accept header, because those change the representation.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(request, *parts):
+    params = sorted(request.query_params.lists())
+    accept = request.META.get('HTTP_ACCEPT', '')
+    digest = hashlib.md5(repr((parts, params, accept)).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def task_validators(request, task):
+    """`(etag, last_modified)` for one task; last_modified is a Unix timestamp."""
+    updated_at = task.updated_at
+    return make_etag(request, task.pk, updated_at.isoformat()), int(updated_at.timestamp())
+
+
+def list_validators(request, version):
+    """`(etag, last_modified)` for a list page read at cache scope `version`."""
+    # Links in the page are absolute, so the host is part of the representation
+    return make_etag(request, version, request.get_host()), None
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 response when the client's validators still match, otherwise None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,155 @@
+"""
+Task change events for the push channel.
+
+Every task write path (TaskViewSet, the async views and TaskAdmin) publishes
+`task.created`, `task.updated` and `task.deactivated` events through
+`publish_task_events` after the write commits. A broker delivers each event to the
+connections of the task's owner, its previous owner after a reassignment,
+and every admin. `TaskEventStreamView` relays them to clients as
+server-sent events.
+
+The default `InMemoryBroker` only reaches connections served by the same
+process. Set `TASK_EVENTS['BACKEND']` to a class with the same `subscribe`,
+`unsubscribe` and `publish` methods to fan out across processes, e.g. over
+Redis pub/sub.
+
+Publishers never wait on a slow client. Each connection buffers at most
+`MAX_BUFFER` events. A connection that falls further behind is closed with
+an `overflow` event, and the client catches up from the changes feed.
+"""
+import asyncio
+import threading
+from collections import defaultdict, deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    'BACKEND': 'tasks.events.InMemoryBroker',
+    'MAX_BUFFER': 100,
+    'MAX_CONNECTIONS_PER_USER': 5,
+    'KEEPALIVE': 15,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TASK_EVENTS', {})}
+
+
+class TooManyConnections(Exception):
+    pass
+
+
+class Overflow(Exception):
+    """The connection fell more than `max_buffer` events behind."""
+
+
+class Subscription:
+    """One client connection's buffer; it lives on the event loop that serves the connection."""
+
+    def __init__(self, user_id, is_admin, max_buffer):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.max_buffer = max_buffer
+        self.loop = asyncio.get_running_loop()
+        self.buffer = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, event):
+        """Buffer `event`; must run on `self.loop`."""
+        if self.overflowed:
+            return
+        if len(self.buffer) >= self.max_buffer:
+            self.overflowed = True
+            self.buffer.clear()
+        else:
+            self.buffer.append(event)
+        self._ready.set()
+
+    async def get(self):
+        """Wait for the next event; raises Overflow once the buffer limit was hit."""
+        while not self.buffer and not self.overflowed:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.overflowed:
+            raise Overflow
+        return self.buffer.popleft()
+
+
+class InMemoryBroker:
+    """Fans events out to the subscriptions of this process; safe to publish from any thread."""
+
+    def __init__(self, max_buffer=100, max_connections_per_user=5):
+        self.max_buffer = max_buffer
+        self.max_connections_per_user = max_connections_per_user
+        self._by_user = defaultdict(set)
+        self._admins = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, is_admin=False):
+        """Call from the event loop that will consume the subscription."""
+        with self._lock:
+            if len(self._by_user[user_id]) >= self.max_connections_per_user:
+                raise TooManyConnections
+            subscription = Subscription(user_id, is_admin, self.max_buffer)
+            self._by_user[user_id].add(subscription)
+            if is_admin:
+                self._admins.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._by_user.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._by_user.pop(subscription.user_id, None)
+            self._admins.discard(subscription)
+
+    def publish(self, event, user_ids):
+        """Deliver `event` to the connections of `user_ids` and of every admin."""
+        with self._lock:
+            targets = set(self._admins)
+            for user_id in user_ids:
+                targets.update(self._by_user.get(user_id, ()))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The connection's event loop has shut down
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    config = get_config()
+    return import_string(config['BACKEND'])(
+        max_buffer=config['MAX_BUFFER'], max_connections_per_user=config['MAX_CONNECTIONS_PER_USER'],
+    )
+
+
+def publish_task_events(event_type, tasks, previous_owners=None):
+    """
+    Publish one `event_type` event per task dict (TaskSerializer output, or
+    just `id` and `user` for deactivations) once the current transaction
+    commits. `previous_owners` maps reassigned task ids to their old owner,
+    who is told about the move as well.
+    """
+    previous_owners = previous_owners or {}
+    events = []
+    for task in tasks:
+        # Owners set from form data arrive as strings; subscriptions are keyed by int
+        owner = int(task["user"])
+        task = {**task, "user": owner}
+        events.append(({"type": event_type, "task": task}, {owner, int(previous_owners.get(task["id"], owner))}))
+    if not events:
+        return
+
+    def publish():
+        broker = get_broker()
+        for event, user_ids in events:
+            broker.publish(event, user_ids)
+
+    transaction.on_commit(publish)
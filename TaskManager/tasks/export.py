@@ -0,0 +1,68 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Same names and order as TaskSerializer
+EXPORT_FIELDS = ['id', 'task_name', 'description', 'due_date', 'status', 'user']
+EXPORT_COLUMNS = ['id', 'task_name', 'description', 'due_date', 'status', 'user_id']
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Accept any media type on the export action. Streamed exports bypass
+    rendering entirely, and TaskViewSet switches error responses to
+    JSONRenderer so their Content-Type matches the body.
+    """
+    media_type = '*/*'
+    format = 'export'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class CSVExportRenderer(ExportRenderer):
+    """Selects CSV through `Accept: text/csv` or `?format=csv`."""
+    media_type = EXPORT_FORMATS['csv'][0]
+    format = 'csv'
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    """Selects NDJSON through `Accept: application/x-ndjson` or `?format=ndjson`."""
+    media_type = EXPORT_FORMATS['ndjson'][0]
+    format = 'ndjson'
+
+
+# The catch-all last, so the specific media types win content negotiation
+EXPORT_RENDERERS = [CSVExportRenderer, NDJSONExportRenderer, ExportRenderer]
+
+
+class _Echo:
+    """File-like object whose `write` returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def stream_rows(export_format, rows):
+    if export_format == 'csv':
+        return stream_csv(rows)
+    return stream_ndjson(rows)
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tasks.archive import archive_inactive_tasks
+from tasks.models import Task
+from tasks.tombstones import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Move soft-deleted tasks not updated for --days days into the archive table, "
+        "and prune changes feed tombstones past TASK_TOMBSTONE_RETENTION_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help="Archive tasks inactive for at least this many days.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Tasks moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many tasks would be archived.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--days must be at least 0 and --batch-size at least 1.")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = Task.objects.filter(is_active=False, updated_at__lt=cutoff).count()
+            self.stdout.write(f"{count} task(s) would be archived.")
+            return
+
+        start = time.perf_counter()
+        archived = 0
+        for moved in archive_inactive_tasks(cutoff, batch_size=options['batch_size']):
+            archived += moved
+            self.stdout.write(f"  {archived} tasks", ending='\r')
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} task(s) in {time.perf_counter() - start:.1f}s."
+        ))
+        self.stdout.write(f"Pruned {prune_tombstones()} expired tombstone(s).")
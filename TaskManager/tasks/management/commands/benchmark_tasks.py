@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmark import TaskBenchmark
+from tasks.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the task endpoints in-process and print p50/p95/p99 latency and "
+        "throughput as JSON. Tasks created by the benchmark are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to benchmark as (default: first regular user).")
+        parser.add_argument('--admin', action='store_true', help="Benchmark as the first admin user instead.")
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--clear-cache', action='store_true', help="Clear the task list cache every iteration.")
+        parser.add_argument('--seed', type=int, help="Random seed for page and task selection.")
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.all()
+        try:
+            if options['user']:
+                user = users.get(username=options['user'])
+            else:
+                user = users.filter(role='admin' if options['admin'] else 'regular').earliest('pk')
+        except CustomUser.DoesNotExist:
+            raise CommandError("No user to benchmark as; run seed_tasks first or pass --user.")
+
+        benchmark = TaskBenchmark(
+            user,
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            clear_cache=options['clear_cache'],
+            seed=options['seed'],
+        )
+        try:
+            report = benchmark.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from tasks.models import Task, CustomUser
+from tasks.pagination import TaskPagination
+from tasks.views import TaskViewSet
+
+
+class Command(BaseCommand):
+    help = "Print the database EXPLAIN plan for each query issued by TaskViewSet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username of the regular user to plan queries for.")
+        parser.add_argument('--admin', help="Username of the admin user to plan queries for.")
+        parser.add_argument('--status', default='pending', help="Status value used for the filtered list plan.")
+        parser.add_argument('--search', default='report', help="Search terms used for the search plan.")
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help="Run EXPLAIN ANALYZE (PostgreSQL/MySQL only); the queries are actually executed.",
+        )
+
+    def handle(self, *args, **options):
+        regular = self._get_user(options['user'], role='regular')
+        admin = self._get_user(options['admin'], role='admin')
+        explain_options = {'analyze': True} if options['analyze'] else {}
+
+        sample = Task.objects.filter(user=regular, is_active=True).values_list('pk', flat=True).first() or 0
+        page_size = TaskPagination.page_size
+
+        plans = [
+            ("list (regular)", self._list_queryset(regular)[:page_size]),
+            ("list (admin)", self._list_queryset(admin)[:page_size]),
+            ("list filtered by status (regular)", self._list_queryset(regular, {'status': options['status']})[:page_size]),
+            ("list filtered by status (admin)", self._list_queryset(admin, {'status': options['status']})[:page_size]),
+            ("search (regular)", self._list_queryset(regular, {'search': options['search']})[:page_size]),
+            ("retrieve", Task.objects.filter(pk=sample, is_active=True)),
+            ("update / destroy (regular)", self._view_for(regular).get_queryset().filter(pk=sample)),
+        ]
+
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        for label, queryset in plans:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}"))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+
+    def _get_user(self, username, role):
+        users = CustomUser.objects.all()
+        try:
+            if username:
+                return users.get(username=username)
+            return users.filter(role=role).earliest('pk')
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No {role} user found; pass --{'admin' if role == 'admin' else 'user'} or create one.")
+
+    def _view_for(self, user, query=None):
+        request = Request(RequestFactory().get('/api/tasks/', query or {}))
+        request.user = user
+        return TaskViewSet(request=request, format_kwarg=None, action='list', kwargs={})
+
+    def _list_queryset(self, user, query=None):
+        view = self._view_for(user, query)
+        return view.filter_queryset(view.get_queryset())
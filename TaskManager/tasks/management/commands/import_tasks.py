@@ -0,0 +1,150 @@
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.cache import invalidate_task_lists
+from tasks.models import Task, CustomUser
+from tasks.serializers import TaskSerializer
+from tasks.stats import apply_summary_deltas, created_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks from a CSV or NDJSON file in bulk_create batches. Each row needs "
+        "task_name, due_date and user (a username, else an email) and may set description and "
+        "status. Rows failing TaskSerializer validation are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT and transaction.")
+        parser.add_argument(
+            '--checkpoint',
+            help="File recording how many rows have been committed; an interrupted import "
+                 "resumes from it when run again with the same file.",
+        )
+        parser.add_argument('--start-offset', type=int, help="Skip this many rows (overrides --checkpoint).")
+        parser.add_argument('--rejects', help="Write rejected rows and their errors to this NDJSON file.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        offset = options['start_offset']
+        if offset is None:
+            offset = self._read_checkpoint(options['checkpoint'])
+
+        # One query for every user the rows may reference. Usernames win over
+        # emails, and accounts without an email are only found by username.
+        usernames, emails = {}, {}
+        for user_id, username, email in CustomUser.objects.values_list('id', 'username', 'email'):
+            usernames[username] = user_id
+            if email:
+                emails[email.lower()] = user_id
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        rejects = open(options['rejects'], 'a', encoding='utf-8') if options['rejects'] else None
+        try:
+            records = itertools.islice(self._read_records(stream, import_format), offset, None)
+            imported, rejected, elapsed = self._import(records, (usernames, emails), offset, rejects, options)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if rejects:
+                rejects.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} tasks, rejected {rejected} rows in {elapsed:.1f}s "
+            f"({(imported + rejected) / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+
+    def _import(self, records, users, offset, rejects, options):
+        imported = rejected = 0
+        start = time.perf_counter()
+
+        while True:
+            batch = list(itertools.islice(records, options['batch_size']))
+            if not batch:
+                break
+
+            tasks, failures = [], []
+            for number, row in batch:
+                task, errors = self._build_task(row, users)
+                if errors:
+                    failures.append({'row': number, 'data': row, 'errors': errors})
+                else:
+                    tasks.append(task)
+
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks)
+                apply_summary_deltas(created_deltas(tasks))
+                invalidate_task_lists({task.user_id for task in tasks})
+            imported += len(tasks)
+            rejected += len(failures)
+            offset += len(batch)
+            if rejects:
+                rejects.writelines(json.dumps(failure) + '\n' for failure in failures)
+                rejects.flush()
+            self._write_checkpoint(options['checkpoint'], offset)
+
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"  {offset} rows processed ({(imported + rejected) / elapsed:.0f} rows/s)")
+
+        return imported, rejected, time.perf_counter() - start
+
+    def _read_records(self, stream, import_format):
+        """Yield `(row_number, row)`; malformed NDJSON lines are yielded as `None` rows."""
+        if import_format == 'csv':
+            for number, row in enumerate(csv.DictReader(stream), start=1):
+                yield number, row
+            return
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row
+
+    def _build_task(self, row, users):
+        if not isinstance(row, dict):
+            return None, {'detail': 'Row is not a JSON object.'}
+
+        user = str(row.get('user') or '').strip()
+        if not user:
+            return None, {'user': 'This field is required.'}
+        usernames, emails = users
+        user_id = usernames.get(user, emails.get(user.lower()))
+        if user_id is None:
+            return None, {'user': f"Unknown user '{user}'."}
+
+        # CSV has no nulls; treat empty optional columns as absent
+        data = {key: value for key, value in row.items() if value not in ('', None) or key == 'description'}
+        serializer = TaskSerializer(data=data)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        return Task(**serializer.validated_data, user_id=user_id), None
+
+    def _read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return json.load(f)['offset']
+
+    def _write_checkpoint(self, path, offset):
+        if not path:
+            return
+        # Replace atomically so a crash never leaves a truncated checkpoint
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({'offset': offset}, f)
+        os.replace(f'{path}.tmp', path)
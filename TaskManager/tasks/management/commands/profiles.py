@@ -0,0 +1,87 @@
+import io
+import pstats
+from collections import defaultdict
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+
+from TaskManager.profiling import ProfileStore, get_config, make_profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise the request profiles captured by ProfilingMiddleware by endpoint, "
+        "list the profiles of one endpoint, or print the top functions of one profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', help="List the profiles of this endpoint (URL name, e.g. task-list).")
+        parser.add_argument('--show', metavar='ID', help="Print the pstats report of one profile.")
+        parser.add_argument(
+            '--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'], help="Sort order for --show."
+        )
+        parser.add_argument('--limit', type=int, default=25, help="Functions printed by --show.")
+        parser.add_argument(
+            '--token', action='store_true',
+            help="Print a signed X-Profile header value that enables profiling for a request.",
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_profile_token())
+            self.stdout.write(f"Valid for {get_config()['TOKEN_MAX_AGE']} seconds.")
+            return
+
+        store = ProfileStore()
+        if options['show']:
+            self.show(store, options['show'], options['sort'], options['limit'])
+            return
+
+        profiles = list(store.profiles())
+        if not profiles:
+            self.stdout.write(f"No profiles in {store.directory}.")
+            return
+        if options['endpoint']:
+            self.list_endpoint(store, profiles, options['endpoint'])
+        else:
+            self.summarise(profiles)
+
+    def summarise(self, profiles):
+        by_endpoint = defaultdict(list)
+        for profile in profiles:
+            by_endpoint[(profile['method'], profile['endpoint'] or '-')].append(profile)
+
+        self.stdout.write(f"{'METHOD':<7} {'ENDPOINT':<30} {'COUNT':>5} {'P50 MS':>9} {'MAX MS':>9}  LATEST")
+        rows = sorted(
+            by_endpoint.items(), key=lambda item: max(p['duration_ms'] for p in item[1]), reverse=True
+        )
+        for (method, endpoint), group in rows:
+            durations = [profile['duration_ms'] for profile in group]
+            self.stdout.write(
+                f"{method:<7} {endpoint:<30} {len(group):>5} {median(durations):>9.1f} {max(durations):>9.1f}  "
+                f"{group[-1]['id']}"
+            )
+
+    def list_endpoint(self, store, profiles, endpoint):
+        matching = [profile for profile in profiles if profile['endpoint'] == endpoint]
+        if not matching:
+            raise CommandError(f"No profiles for endpoint {endpoint!r}.")
+        for profile in matching:
+            self.stdout.write(
+                f"{profile['id']}  {profile['method']} {profile['path']} {profile['status']} "
+                f"{profile['duration_ms']:.1f} ms  {store.path(profile['id'], '.collapsed')}"
+            )
+
+    def show(self, store, profile_id, sort, limit):
+        path = store.path(profile_id, '.prof')
+        if not path.exists():
+            raise CommandError(f"No profile {profile_id!r} in {store.directory}.")
+        profile = store.load(profile_id)
+        self.stdout.write(
+            f"{profile['method']} {profile['path']} ({profile['endpoint']}) {profile['status']} "
+            f"{profile['duration_ms']:.1f} ms"
+        )
+        out = io.StringIO()
+        pstats.Stats(str(path), stream=out).sort_stats(sort).print_stats(limit)
+        self.stdout.write(out.getvalue())
+        self.stdout.write(f"Flame graph input: {store.path(profile_id, '.collapsed')}")
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.stats import rebuild_task_summary
+
+
+class Command(BaseCommand):
+    help = "Recompute the TaskSummary statistics table from the tasks table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        buckets = rebuild_task_summary(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {buckets} summary buckets in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,98 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.cache import invalidate_task_lists
+from tasks.models import Task, CustomUser
+from tasks.stats import apply_summary_deltas, created_deltas
+
+# Rough production mix
+STATUS_WEIGHTS = {'pending': 50, 'in_progress': 20, 'completed': 30}
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic users and tasks with bulk_create for local load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Number of regular users to create.")
+        parser.add_argument('--admins', type=int, default=1, help="Number of admin users to create.")
+        parser.add_argument('--tasks', type=int, default=10000, help="Number of tasks to create.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help="Username prefix; must not collide with existing users.")
+        parser.add_argument('--password', default='password', help="Password shared by every seeded user.")
+        parser.add_argument('--inactive-ratio', type=float, default=0.05, help="Fraction of soft-deleted tasks.")
+        parser.add_argument('--seed', type=int, help="Random seed, for reproducible data sets.")
+
+    def handle(self, *args, **options):
+        if options['users'] + options['admins'] < 1:
+            raise CommandError("At least one user is required to own the tasks.")
+        if CustomUser.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users prefixed '{options['prefix']}_' already exist; pick another --prefix.")
+
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+
+        user_ids = self._create_users(options)
+        task_count = self._create_tasks(rng, user_ids, options)
+        invalidate_task_lists(user_ids)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} users and {task_count} tasks in {elapsed:.1f}s "
+            f"({task_count / elapsed if elapsed else 0:.0f} tasks/s)."
+        ))
+
+    def _create_users(self, options):
+        # Hashing is deliberately slow; do it once and share the hash.
+        password = make_password(options['password'])
+        prefix = options['prefix']
+        users = [
+            CustomUser(username=f"{prefix}_admin_{i}", email=f"{prefix}_admin_{i}@example.com",
+                       password=password, role='admin')
+            for i in range(options['admins'])
+        ] + [
+            CustomUser(username=f"{prefix}_user_{i}", email=f"{prefix}_user_{i}@example.com",
+                       password=password, role='regular')
+            for i in range(options['users'])
+        ]
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=options['batch_size'])
+        return list(
+            CustomUser.objects.filter(username__startswith=f"{prefix}_").values_list('id', flat=True)
+        )
+
+    def _create_tasks(self, rng, user_ids, options):
+        today = timezone.localdate()
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        batch_size = options['batch_size']
+        remaining = options['tasks']
+        created = 0
+
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            batch = []
+            for status, user_id in zip(rng.choices(statuses, weights, k=size), rng.choices(user_ids, k=size)):
+                # Most work is due within a few weeks either side of today
+                due_date = today + timedelta(days=round(rng.gauss(0, 30)))
+                batch.append(Task(
+                    user_id=user_id,
+                    task_name=f"Task {created + len(batch) + 1}",
+                    description=rng.choice([None, "", "Synthetic task generated by seed_tasks."]),
+                    status=status,
+                    due_date=due_date,
+                    is_active=rng.random() >= options['inactive_ratio'],
+                ))
+            with transaction.atomic():
+                Task.objects.bulk_create(batch)
+                apply_summary_deltas(created_deltas(batch))
+            created += size
+            remaining -= size
+            self.stdout.write(f"  {created} tasks", ending='\r')
+        self.stdout.write('')
+        return created
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.sweeper import OverdueSweeper
+
+
+class Command(BaseCommand):
+    help = (
+        "Hand tasks that became overdue since the last sweep to the OVERDUE_SWEEP notifier. "
+        "With --loop, keep sweeping every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Tasks per keyset batch (default OVERDUE_SWEEP['BATCH_SIZE']).")
+        parser.add_argument('--workers', type=int, help="Notifier threads (default OVERDUE_SWEEP['WORKERS']).")
+        parser.add_argument('--reset', action='store_true', help="Forget the checkpoint and sweep every overdue task.")
+        parser.add_argument('--loop', action='store_true', help="Run until interrupted.")
+        parser.add_argument('--interval', type=float, default=300, help="Seconds between sweeps with --loop.")
+
+    def handle(self, *args, **options):
+        for name in ('batch_size', 'workers'):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1.")
+        sweeper = OverdueSweeper(batch_size=options['batch_size'], workers=options['workers'])
+        if options['reset']:
+            sweeper.reset()
+
+        try:
+            while True:
+                start = time.perf_counter()
+                notified, failed = sweeper.run()
+                message = f"Notified {notified} overdue task(s) in {time.perf_counter() - start:.1f}s"
+                if failed:
+                    self.stdout.write(self.style.WARNING(f"{message}; {failed} notification(s) failed."))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{message}."))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'is_active', 'status', 'due_date'], name='task_user_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', 'due_date'], name='task_active_status_due_idx'),
+        ),
+    ]
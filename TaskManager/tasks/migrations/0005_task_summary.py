@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_task_summary(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskSummary = apps.get_model('tasks', 'TaskSummary')
+    rows = (
+        Task.objects.order_by()
+        .values('user_id', 'due_date', 'status', 'is_active')
+        .annotate(total=models.Count('id'))
+    )
+    TaskSummary.objects.bulk_create(
+        (
+            TaskSummary(
+                user_id=row['user_id'], due_date=row['due_date'], status=row['status'],
+                is_active=row['is_active'], count=row['total'],
+            )
+            for row in rows.iterator(chunk_size=5000)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_status_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('in_progress', 'In Progress')], max_length=50)),
+                ('is_active', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'due_date', 'status', 'is_active'), name='task_summary_bucket_unique')],
+            },
+        ),
+        migrations.RunPython(build_task_summary, migrations.RunPython.noop),
+    ]
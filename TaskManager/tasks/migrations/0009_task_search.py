@@ -0,0 +1,86 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:14
+
+import django.db.models.deletion
+import tasks.models
+from django.db import migrations, models
+
+# SQLite: an FTS5 index using the tasks table as external content, so the
+# text is not stored twice. Triggers keep it in step with every write,
+# including bulk and raw ones. Django rebuilds a SQLite table (dropping its
+# triggers) when some fields of it are altered. A later migration that does
+# that to tasks_task must run SQLITE_TRIGGERS again.
+SQLITE_TABLE = (
+    "CREATE VIRTUAL TABLE tasks_task_fts USING fts5("
+    "task_name, description, content='tasks_task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+SQLITE_TRIGGERS = [
+    """CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts (rowid, task_name, description)
+        VALUES (new.id, new.task_name, new.description);
+    END""",
+    """CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, task_name, description)
+        VALUES ('delete', old.id, old.task_name, old.description);
+    END""",
+    # Status changes and other saves leave the index alone
+    """CREATE TRIGGER tasks_task_fts_update AFTER UPDATE OF task_name, description ON tasks_task
+    WHEN old.task_name IS NOT new.task_name OR old.description IS NOT new.description BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, task_name, description)
+        VALUES ('delete', old.id, old.task_name, old.description);
+        INSERT INTO tasks_task_fts (rowid, task_name, description)
+        VALUES (new.id, new.task_name, new.description);
+    END""",
+]
+SEARCH_CONFIG = 'english'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_TABLE)
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+        schema_editor.execute("INSERT INTO tasks_task_fts (tasks_task_fts) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        # Imported here: django.contrib.postgres needs psycopg installed
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        # Must stay identical to the vector tasks.search queries with
+        Task = apps.get_model('tasks', 'Task')
+        index = GinIndex(SearchVector('task_name', 'description', config=SEARCH_CONFIG), name='task_search_idx')
+        schema_editor.add_index(Task, index)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for name in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS tasks_task_fts_{name}")
+        schema_editor.execute("DROP TABLE IF EXISTS tasks_task_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS task_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_overdue_sweep'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchEntry',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='tasks.task')),
+                ('document', tasks.models.SearchDocumentField(db_column='tasks_task_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tasks_task_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sweepcheckpoint',
+            name='failed_task_ids',
+            field=models.JSONField(default=list),
+        ),
+    ]
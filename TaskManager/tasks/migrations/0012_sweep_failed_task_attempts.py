@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+
+def count_attempts(apps, schema_editor):
+    SweepCheckpoint = apps.get_model('tasks', 'SweepCheckpoint')
+    for checkpoint in SweepCheckpoint.objects.exclude(failed_task_ids=[]):
+        checkpoint.failed_tasks = {str(task_id): 1 for task_id in checkpoint.failed_task_ids}
+        checkpoint.save(update_fields=['failed_tasks'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_sweep_failed_task_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sweepcheckpoint',
+            name='failed_tasks',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(count_attempts, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='sweepcheckpoint',
+            name='failed_task_ids',
+        ),
+    ]
@@ -20,10 +20,178 @@ class Task(models.Model):
 
     class Meta:
         ordering = ['due_date']
+        indexes = [
+            # Regular users: WHERE user_id = ? AND is_active ORDER BY due_date
+            models.Index(fields=['user', 'is_active', 'due_date'], name='task_user_active_due_idx'),
+            # Admins: WHERE is_active ORDER BY due_date, only over live rows
+            models.Index(
+                fields=['due_date', 'id'],
+                name='task_active_due_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Status filters: WHERE ... AND status IN (...) ORDER BY due_date
+            models.Index(fields=['user', 'is_active', 'status', 'due_date'], name='task_user_status_due_idx'),
+            models.Index(
+                fields=['status', 'due_date'],
+                name='task_active_status_due_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Changes feed: WHERE user_id = ? AND updated_at > ? ORDER BY updated_at, id
+            models.Index(fields=['user', 'updated_at', 'id'], name='task_user_updated_idx'),
+            # Admins' changes feed across every user
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+            # sweep_overdue: open tasks in (due_date, id) order
+            models.Index(
+                fields=['due_date', 'id'],
+                name='task_open_due_idx',
+                condition=models.Q(is_active=True) & ~models.Q(status='completed'),
+            ),
+            # archive_tasks: inactive rows, oldest deactivation first
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='task_inactive_updated_idx',
+                condition=models.Q(is_active=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the summary bucket the row was loaded in, so saves can move
+        # it to its new bucket without re-reading the row (see tasks.stats).
+        if SUMMARY_FIELDS.issubset(field_names):
+            instance._summary_key = instance.summary_key()
+        return instance
+
+    def summary_key(self):
+        return (self.user_id, self.due_date, self.status, self.is_active)
 
     def soft_delete(self):
         self.is_active = False
         self.save()
 
     def __str__(self):
-        return self.task_name
\ No newline at end of file
+        return self.task_name
+
+
+SUMMARY_FIELDS = {'user_id', 'due_date', 'status', 'is_active'}
+
+
+class TaskSummary(models.Model):
+    """
+    Number of tasks per (user, due_date, status, is_active), kept up to date by
+    every Task write path so statistics never have to scan the tasks table.
+    Rebuild with `manage.py rebuild_task_summary`.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='task_summaries')
+    due_date = models.DateField()
+    status = models.CharField(max_length=50, choices=Task.STATUS_CHOICES)
+    is_active = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'due_date', 'status', 'is_active'], name='task_summary_bucket_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.due_date} {self.status} {'active' if self.is_active else 'inactive'}: {self.count}"
+
+class ArchivedTask(models.Model):
+    """
+    A soft-deleted task moved out of the tasks table by `manage.py
+    archive_tasks`, keeping its original id so it can be restored as is.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_tasks')
+    task_name = models.CharField(max_length=50)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=50, choices=Task.STATUS_CHOICES)
+    due_date = models.DateField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['user', 'due_date', 'id'], name='archived_task_user_due_idx'),
+            models.Index(fields=['due_date', 'id'], name='archived_task_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.task_name
+
+
+class SearchDocumentField(models.TextField):
+    """FTS5's hidden column named after the table; only usable with `__match`."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class TaskSearchEntry(models.Model):
+    """
+    A row of the SQLite FTS5 index over task names and descriptions. The
+    table and the triggers keeping it in sync come from migration 0009 and
+    only exist on SQLite. Only read through joins in `tasks.search`.
+    """
+    task = models.OneToOneField(
+        Task, primary_key=True, db_column='rowid', db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column='tasks_task_fts')
+    # bm25 score of the current MATCH; lower is more relevant
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'tasks_task_fts'
+
+
+class SweepCheckpoint(models.Model):
+    """
+    Where a sweep (e.g. `sweep_overdue`) stopped, as a `(due_date, task_id)`
+    keyset position, and the tasks behind it whose handling failed, as
+    `{task_id: failed attempts}` (JSON object keys are strings).
+    """
+    name = models.CharField(max_length=50, unique=True)
+    due_date = models.DateField(null=True)
+    task_id = models.BigIntegerField(null=True)
+    failed_tasks = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.due_date} #{self.task_id}"
+
+
+class TaskTombstone(models.Model):
+    """
+    A task that left `user`'s changes feed with no row left to report it:
+    deleted outright, moved to the archive, or (`reassigned`) given to
+    another user. See tasks.tombstones.
+    """
+    task_id = models.BigIntegerField()
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='task_tombstones')
+    reassigned = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Changes feed: WHERE user_id = ? AND deleted_at > ? ORDER BY deleted_at, id
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+            # Admins' changes feed, and pruning
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} left {self.user_id} at {self.deleted_at}"
@@ -0,0 +1,156 @@
+import datetime
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskKeysetPagination(CursorPagination):
+    """
+    Keyset pagination over `(due_date, id)`.
+
+    Each page is a single indexed range scan: no `COUNT(*)` and no `OFFSET`,
+    so deep pages cost the same as the first one. Cursors are opaque to
+    clients and only ever produced by this class.
+    """
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('due_date', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        if self.reverse:
+            queryset = queryset.order_by('-due_date', '-id')
+        else:
+            queryset = queryset.order_by('due_date', 'id')
+
+        if self.position is not None:
+            due_date, pk = self.position
+            if self.reverse:
+                queryset = queryset.filter(Q(due_date__lt=due_date) | Q(due_date=due_date, id__lt=pk))
+            else:
+                queryset = queryset.filter(Q(due_date__gt=due_date) | Q(due_date=due_date, id__gt=pk))
+
+        # Fetch one extra row to learn whether there is another page.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        # A cursor always points at a row we have already shown, so there is
+        # at least one row on the side we came from.
+        if self.reverse:
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._get_position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        """Return `((due_date, id), reverse)`; an empty cursor starts at the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, strict_parsing=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            due_date = datetime.date.fromisoformat(tokens['d'][0])
+            pk = int(tokens['i'][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return (due_date, pk), reverse
+
+    def encode_cursor(self, position, reverse):
+        due_date, pk = position
+        tokens = {'d': due_date.isoformat(), 'i': str(pk)}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, row):
+        if isinstance(row, dict):
+            return row['due_date'], row['id']
+        return row.due_date, row.pk
+
+
+class TaskPagination(PageNumberPagination):
+    """
+    Page-number pagination, with keyset pagination opted into by sending a
+    `cursor` query parameter (`?cursor=` for the first page).
+    """
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    keyset_class = TaskKeysetPagination
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
+
+
+def encode_sync_token(position, tombstone_position):
+    """
+    Opaque changes-feed position: the `(updated_at, id)` of the last task and
+    the `(deleted_at, id)` of the last tombstone seen.
+    """
+    (updated_at, pk), (deleted_at, tombstone_pk) = position, tombstone_position
+    querystring = parse.urlencode({
+        't': updated_at.isoformat(), 'i': str(pk), 'dt': deleted_at.isoformat(), 'di': str(tombstone_pk),
+    })
+    return b64encode(querystring.encode('ascii')).decode('ascii')
+
+
+def decode_sync_token(token):
+    """Return `((updated_at, id), (deleted_at, id))`; raises ValueError for anything we did not issue."""
+    try:
+        tokens = parse.parse_qs(b64decode(token.encode('ascii'), validate=True).decode('ascii'), strict_parsing=True)
+        updated_at = datetime.datetime.fromisoformat(tokens['t'][0])
+        pk = int(tokens['i'][0])
+        deleted_at = datetime.datetime.fromisoformat(tokens['dt'][0])
+        tombstone_pk = int(tokens['di'][0])
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValueError("Invalid sync token.")
+    if updated_at.tzinfo is None or deleted_at.tzinfo is None:
+        raise ValueError("Invalid sync token.")
+    return (updated_at, pk), (deleted_at, tombstone_pk)
@@ -13,4 +13,4 @@ class IsAdminOrOwner(BasePermission):
             return True
 
         # Regular users can access only their own tasks
-        return obj.user == request.user
+        return obj.user_id == request.user.id
@@ -0,0 +1,64 @@
+"""
+Full-text search over task names and descriptions, for `?search=`.
+
+`search_tasks` narrows a task queryset to matching tasks, most relevant
+first, using the text index from migration 0009:
+
+- SQLite: the `tasks_task_fts` FTS5 table, joined through `TaskSearchEntry`
+  and ranked by bm25. Every word must match, and the last one also matches
+  as a prefix, so results follow the user as they type.
+- PostgreSQL: the `task_search_idx` GIN index over a tsvector of both
+  columns, queried with `websearch_to_tsquery` and ranked with `ts_rank`.
+- Other backends: case-insensitive substring matches, unranked.
+
+The ordering only holds for page-number pagination. Keyset pagination
+(`?cursor=`) pages through the matches in `(due_date, id)` order instead.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+# Must match the index created by migration 0009
+SEARCH_CONFIG = 'english'
+
+_WORD = re.compile(r'\w+')
+
+
+def fts5_query(text):
+    """
+    FTS5 query for free text: each word quoted, so the query syntax never
+    reaches FTS5, and the last one as a prefix. None when `text` has no words.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def search_tasks(queryset, text):
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'sqlite':
+        query = fts5_query(text)
+        if query is None:
+            return queryset.none()
+        return queryset.filter(search_entry__document__match=query).order_by('search_entry__rank', 'id')
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector('task_name', 'description', config=SEARCH_CONFIG)
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        # alias(), not annotate(): list pages select only the ?fields= columns
+        return (
+            queryset.alias(search=vector).filter(search=query)
+            .order_by(SearchRank(vector, query).desc(), 'id')
+        )
+
+    words = _WORD.findall(text)
+    if not words:
+        return queryset.none()
+    for word in words:
+        queryset = queryset.filter(Q(task_name__icontains=word) | Q(description__icontains=word))
+    return queryset
@@ -1,9 +1,93 @@
-from .models import Task
-from rest_framework import serializers
+from .models import ArchivedTask, Task
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 
 class TaskSerializer(serializers.ModelSerializer):
+    """Accepts `fields=[...]` to render only some of its fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Task
         fields = ['id', 'task_name', 'description', 'due_date', 'status', 'user']
-        read_only_fields = ['user']
\ No newline at end of file
+        read_only_fields = ['user']
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTask
+        fields = ['id', 'task_name', 'description', 'due_date', 'status', 'user', 'archived_at']
+        read_only_fields = fields
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.RegexField(r'^/api/', max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def __init__(self, *args, max_operations=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if max_operations is not None:
+            self.fields['operations'].max_length = max_operations
+
+
+def parse_fields(query_params):
+    """
+    The field names asked for by `?fields=id,task_name`, in TaskSerializer
+    order, or None when the parameter is absent.
+    """
+    value = query_params.get('fields')
+    if value is None:
+        return None
+    requested = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(requested) - set(TaskSerializer.Meta.fields))
+    if unknown or not requested:
+        raise serializers.ValidationError({
+            "fields": f"Unknown field(s): {', '.join(unknown) or '(none given)'}. "
+                      f"Choose from {', '.join(TaskSerializer.Meta.fields)}."
+        })
+    return [name for name in TaskSerializer.Meta.fields if name in requested]
+
+
+def _date_to_representation(value):
+    return None if value is None else value.isoformat()
+
+
+class TaskReadSerializer:
+    """
+    Read-only list path: builds each item straight from a `values()` row.
+
+    Skips the per-field `to_representation` calls of TaskSerializer while
+    producing identical output. Columns the paginator orders by are always
+    selected but only rendered when asked for.
+    """
+    pagination_columns = ('id', 'due_date')
+
+    def __init__(self, fields=None):
+        self.fields = list(fields or TaskSerializer.Meta.fields)
+        to_date = _date_to_representation
+        if api_settings.DATE_FORMAT != ISO_8601:
+            to_date = serializers.DateField().to_representation
+        self.converters = [(name, to_date if name == 'due_date' else None) for name in self.fields]
+
+    @property
+    def columns(self):
+        # `values('user')` yields the user's id, exactly what TaskSerializer renders
+        return list(dict.fromkeys([*self.fields, *self.pagination_columns]))
+
+    def to_representation(self, rows):
+        converters = self.converters
+        return [
+            {name: convert(row[name]) if convert else row[name] for name, convert in converters}
+            for row in rows
+        ]
@@ -0,0 +1,47 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_task_lists
+from .models import CustomUser, Task
+from .stats import apply_summary_deltas, changed_deltas
+from .tombstones import record_tombstones
+
+
+def _deleted_with_user(origin):
+    """Whether a Task delete is the cascade of deleting its user."""
+    return isinstance(origin, CustomUser) or getattr(origin, 'model', None) is CustomUser
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_cached_task_lists(sender, instance, **kwargs):
+    """Covers Task.save, Task.soft_delete and destroy; bulk paths invalidate explicitly."""
+    invalidate_task_lists([instance.user_id])
+
+
+@receiver(post_save, sender=Task)
+def update_task_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        instance._summary_key = None
+    apply_summary_deltas(changed_deltas([instance]))
+
+
+@receiver(post_delete, sender=Task)
+def update_task_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting a user cascades to their buckets as well as their tasks
+    if _deleted_with_user(origin):
+        return
+    key = getattr(instance, '_summary_key', None) or instance.summary_key()
+    apply_summary_deltas(Counter({key: -1}))
+
+
+@receiver(post_delete, sender=Task)
+def record_tombstone_on_delete(sender, instance, origin=None, **kwargs):
+    # A deleted user has no feed left to tell
+    if _deleted_with_user(origin):
+        return
+    record_tombstones([(instance.pk, instance.user_id)])
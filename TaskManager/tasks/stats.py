@@ -0,0 +1,139 @@
+"""
+Incrementally maintained task statistics.
+
+`TaskSummary` holds one counter per (user, due_date, status, is_active).
+Single saves and deletes move a task between buckets from the Task signal
+handlers. Bulk paths, which send no signals, call `apply_summary_deltas`
+themselves. Reading statistics only touches a user's buckets, never the
+tasks table.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Task, TaskSummary
+
+
+def created_deltas(tasks):
+    return Counter(task.summary_key() for task in tasks)
+
+
+def changed_deltas(tasks):
+    """Deltas for saved tasks that were loaded from the database; refreshes their remembered bucket."""
+    deltas = Counter()
+    for task in tasks:
+        previous = getattr(task, '_summary_key', None)
+        current = task.summary_key()
+        if previous != current:
+            if previous is not None:
+                deltas[previous] -= 1
+            deltas[current] += 1
+            task._summary_key = current
+    return deltas
+
+
+def apply_summary_deltas(deltas, batch_size=1000):
+    """Add each `{(user_id, due_date, status, is_active): delta}` to its bucket."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if len(deltas) == 1:
+        _apply_single_delta(*deltas.popitem())
+    elif deltas:
+        _apply_many_deltas(deltas, batch_size)
+
+
+def _apply_single_delta(key, delta):
+    user_id, due_date, status, is_active = key
+    bucket = TaskSummary.objects.filter(user_id=user_id, due_date=due_date, status=status, is_active=is_active)
+    if bucket.update(count=F('count') + delta) or delta < 0:
+        # A missing bucket has nothing to take away from; it may have been
+        # cascade-deleted with its user, or the task was never counted
+        return
+    try:
+        with transaction.atomic():
+            TaskSummary.objects.create(
+                user_id=user_id, due_date=due_date, status=status, is_active=is_active, count=delta
+            )
+    except IntegrityError:
+        # Created concurrently since the UPDATE above
+        bucket.update(count=F('count') + delta)
+
+
+def _apply_many_deltas(deltas, batch_size):
+    """Bulk paths: one UPDATE per distinct delta value instead of one per bucket."""
+    with transaction.atomic():
+        # Only buckets that gain tasks are created; see _apply_single_delta
+        TaskSummary.objects.bulk_create(
+            [
+                TaskSummary(user_id=user_id, due_date=due_date, status=status, is_active=is_active, count=0)
+                for (user_id, due_date, status, is_active), delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+            batch_size=batch_size,
+        )
+        candidates = TaskSummary.objects.filter(
+            user_id__in={key[0] for key in deltas}, due_date__in={key[1] for key in deltas}
+        ).values_list('pk', 'user_id', 'due_date', 'status', 'is_active')
+        pks_by_delta = defaultdict(list)
+        for pk, *key in candidates.iterator(chunk_size=batch_size):
+            delta = deltas.get(tuple(key))
+            if delta:
+                pks_by_delta[delta].append(pk)
+        # F() updates are atomic, so concurrent writers to a bucket never lose counts
+        for delta, pks in pks_by_delta.items():
+            for offset in range(0, len(pks), batch_size):
+                TaskSummary.objects.filter(pk__in=pks[offset:offset + batch_size]).update(count=F('count') + delta)
+
+
+def rebuild_task_summary(batch_size=5000):
+    """Recompute every bucket from the tasks table; returns the number of buckets."""
+    rows = (
+        Task.objects.order_by()
+        .values('user_id', 'due_date', 'status', 'is_active')
+        .annotate(total=Count('id'))
+    )
+    with transaction.atomic():
+        TaskSummary.objects.all().delete()
+        buckets = [
+            TaskSummary(
+                user_id=row['user_id'], due_date=row['due_date'], status=row['status'],
+                is_active=row['is_active'], count=row['total'],
+            )
+            for row in rows.iterator(chunk_size=batch_size)
+        ]
+        TaskSummary.objects.bulk_create(buckets, batch_size=batch_size)
+    return len(buckets)
+
+
+def get_task_stats(user_id=None, today=None):
+    """Counts by status, active/inactive, overdue and due this week (Monday to Sunday)."""
+    today = today or timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+
+    buckets = TaskSummary.objects.all()
+    if user_id is not None:
+        buckets = buckets.filter(user_id=user_id)
+
+    open_tasks = Q(is_active=True) & ~Q(status='completed')
+    aggregates = {
+        status: Sum('count', filter=Q(is_active=True, status=status)) for status, _ in Task.STATUS_CHOICES
+    }
+    totals = buckets.aggregate(
+        **aggregates,
+        active=Sum('count', filter=Q(is_active=True)),
+        inactive=Sum('count', filter=Q(is_active=False)),
+        overdue=Sum('count', filter=open_tasks & Q(due_date__lt=today)),
+        due_this_week=Sum('count', filter=open_tasks & Q(due_date__range=(week_start, week_end))),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    return {
+        "by_status": {status: totals[status] for status, _ in Task.STATUS_CHOICES},
+        "active": totals['active'],
+        "inactive": totals['inactive'],
+        "overdue": totals['overdue'],
+        "due_this_week": totals['due_this_week'],
+    }
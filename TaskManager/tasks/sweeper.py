@@ -0,0 +1,164 @@
+"""
+Overdue-task sweeper.
+
+`OverdueSweeper` walks active, non-completed tasks due before today in
+`(due_date, id)` keyset batches over the `task_open_due_idx` partial
+index. It hands each task to the configured notifier on a bounded thread
+pool. After each batch it saves its position in a `SweepCheckpoint`, so
+the next sweep starts where this one stopped and only sees tasks that
+became overdue since.
+
+The checkpoint moves past tasks whose notification failed, so one task the
+notifier keeps rejecting cannot hold the sweep back. Their ids are kept in
+the checkpoint instead, with a count of failed attempts, and each sweep
+first retries them, as long as they are still open and overdue. A task is
+given up on, with an error logged, after `MAX_ATTEMPTS` failures. At most
+`MAX_FAILED` tasks wait for a retry; failures beyond that are logged and
+not retried, so an outage of the notifier cannot grow the checkpoint
+without bound.
+
+A task whose due date is moved back behind the checkpoint is not picked up
+again until the checkpoint is reset (`sweep_overdue --reset`). Notifiers
+should therefore tolerate seeing a task twice.
+
+Notifiers are configured by `OVERDUE_SWEEP['NOTIFIER']`: a class whose
+instances have a `notify(task)` method. Tasks arrive with `user` already
+loaded. Notifiers run on worker threads and should avoid the database; any
+connection they do open is closed after the call.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import SweepCheckpoint, Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'NOTIFIER': 'tasks.sweeper.LoggingNotifier',
+    'WORKERS': 4,
+    'BATCH_SIZE': 500,
+    'MAX_ATTEMPTS': 5,
+    'MAX_FAILED': 10000,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'OVERDUE_SWEEP', {})}
+
+
+class LoggingNotifier:
+    """Default notifier: logs one warning per overdue task."""
+
+    def notify(self, task):
+        logger.warning(
+            "Task %s (%r) of user %s is overdue since %s", task.pk, task.task_name, task.user_id, task.due_date
+        )
+
+
+class OverdueSweeper:
+    checkpoint_name = 'overdue'
+
+    def __init__(self, notifier=None, batch_size=None, workers=None):
+        config = get_config()
+        self.notifier = notifier or import_string(config['NOTIFIER'])()
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self.workers = workers or config['WORKERS']
+        self.max_attempts = config['MAX_ATTEMPTS']
+        self.max_failed = config['MAX_FAILED']
+
+    def get_queryset(self, today):
+        """Overdue tasks; the condition matches `task_open_due_idx`."""
+        return (
+            Task.objects.filter(is_active=True, due_date__lt=today)
+            .exclude(status='completed')
+            .select_related('user')
+            .order_by('due_date', 'id')
+        )
+
+    def reset(self):
+        SweepCheckpoint.objects.filter(name=self.checkpoint_name).delete()
+
+    def run(self, today=None):
+        """
+        Retry the failed notifications of earlier sweeps, then notify every
+        task that became overdue since the last sweep; returns `(notified,
+        failed)` over both.
+        """
+        today = today or timezone.localdate()
+        checkpoint, _ = SweepCheckpoint.objects.get_or_create(name=self.checkpoint_name)
+        queryset = self.get_queryset(today)
+        retry, checkpoint.failed_tasks = checkpoint.failed_tasks, {}
+        retry_ids = [int(pk) for pk in retry]
+        notified = failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sweep-overdue') as pool:
+            # Retried tasks that were closed meanwhile are dropped here
+            for start in range(0, len(retry_ids), self.batch_size):
+                tasks = list(queryset.filter(pk__in=retry_ids[start:start + self.batch_size]))
+                ok, failures = self._notify_batch(pool, tasks)
+                notified += ok
+                failed += len(failures)
+                self._record_failures(checkpoint, failures, retry)
+            checkpoint.save(update_fields=['failed_tasks', 'updated_at'])
+
+            while True:
+                batch = queryset
+                if checkpoint.due_date is not None:
+                    batch = batch.filter(
+                        Q(due_date__gt=checkpoint.due_date) | Q(id__gt=checkpoint.task_id),
+                        due_date__gte=checkpoint.due_date,
+                    )
+                tasks = list(batch[:self.batch_size])
+                if not tasks:
+                    break
+
+                ok, failures = self._notify_batch(pool, tasks)
+                notified += ok
+                failed += len(failures)
+                checkpoint.due_date, checkpoint.task_id = tasks[-1].due_date, tasks[-1].pk
+                update_fields = ['due_date', 'task_id', 'updated_at']
+                if failures:
+                    self._record_failures(checkpoint, failures)
+                    update_fields.append('failed_tasks')
+                checkpoint.save(update_fields=update_fields)
+        return notified, failed
+
+    def _record_failures(self, checkpoint, failures, previous=None):
+        """Keep the ids of `failures` for a retry unless they used up their attempts or the list is full."""
+        previous = previous or {}
+        for pk in failures:
+            key = str(pk)
+            if key in checkpoint.failed_tasks:
+                continue
+            attempts = previous.get(key, 0) + 1
+            if attempts >= self.max_attempts:
+                logger.error("Giving up on overdue task %s after %s failed notifications", pk, attempts)
+            elif len(checkpoint.failed_tasks) >= self.max_failed:
+                logger.error("Overdue task %s will not be retried: %s failures already pending", pk, self.max_failed)
+            else:
+                checkpoint.failed_tasks[key] = attempts
+
+    def _notify_batch(self, pool, tasks):
+        """Notify `tasks` on `pool`; returns the number notified and the ids that failed."""
+        # One batch in flight at a time: the pool never queues more than
+        # batch_size tasks, however slow the notifier is.
+        results = list(pool.map(self._notify, tasks))
+        return results.count(True), [task.pk for task, ok in zip(tasks, results) if not ok]
+
+    def _notify(self, task):
+        try:
+            self.notifier.notify(task)
+            return True
+        except Exception:
+            logger.exception("Notifier failed for overdue task %s", task.pk)
+            return False
+        finally:
+            # Worker threads get their own connection if the notifier queries
+            if connection.connection is not None:
+                connection.close()
@@ -1,9 +1,42 @@
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Task
-from datetime import date
+from TaskManager.metrics import Counter as MetricCounter, Histogram, Registry
+from TaskManager.profiling import ProfileStore, collapsed_stacks, make_profile_token
+from TaskManager.db_routers import ReplicaRouter, _read_alias, is_pinned, replica_reads
+from TaskManager.renderers import FastJSONRenderer, msgpack
+from users.authentication import user_state_cache
+from users.tokens import RoleRefreshToken
+from .admin import EstimatedCountPaginator, TaskAdmin
+from .archive import archive_inactive_tasks
+from .events import InMemoryBroker, Overflow, TooManyConnections, get_broker
+from .models import ArchivedTask, SweepCheckpoint, Task, TaskSummary, TaskTombstone
+from .serializers import TaskReadSerializer, TaskSerializer
+from .stats import get_task_stats
+from .sweeper import OverdueSweeper
+from .tombstones import prune_tombstones
+from .views import TaskViewSet
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import tempfile
+from asgiref.sync import async_to_sync
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -129,10 +162,1371 @@ class TaskViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(len(response.data['results']) > 0)
 
+    def test_filter_task_status_multiple_values(self):
+        self.task2.status = 'completed'
+        self.task2.save()
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.get('/api/tasks/?status=pending&status=completed', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get('/api/tasks/?status__in=completed,in_progress', HTTP_AUTHORIZATION=auth)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task2.id])
+
+    def test_filter_task_status_unknown_value_rejected(self):
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.get('/api/tasks/?status=pend', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+        response = self.client.get('/api/tasks/?status__in=pending,bogus', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_task_due_date_range(self):
+        url = '/api/tasks/?due_date_after=2024-12-26&due_date_before=2024-12-27'
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.admin_user_token}')
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task2.id, self.task3.id])
+
     # Test Case 10: Pagination Test
     def test_task_pagination(self):
         url = '/api/tasks/?page=1'
         response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('results' in response.data)
-        self.assertTrue(len(response.data['results']) <= 5)  # Assuming page size is 5
\ No newline at end of file
+        self.assertTrue(len(response.data['results']) <= 5)  # Assuming page size is 5
+    # Test Case 11: Cursor pagination walks forward and back without counting
+    def test_task_cursor_pagination(self):
+        Task.objects.create(
+            task_name="Task 4", due_date=date(2024, 12, 25), user=self.regular_user, is_active=True
+        )
+        auth = f'Bearer {self.regular_user_token}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?cursor=&page_size=2', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        first_page = [task['id'] for task in response.data['results']]
+
+        response = self.client.get(response.data['next'], HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task2.id])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(response.data['previous'], HTTP_AUTHORIZATION=auth)
+        self.assertEqual([task['id'] for task in response.data['results']], first_page)
+
+    def test_task_cursor_pagination_invalid_cursor(self):
+        response = self.client.get('/api/tasks/?cursor=bogus', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # Test Case 12: Bulk create reports invalid items without failing the batch
+    def test_bulk_create_partial_success(self):
+        data = [
+            {'task_name': 'Bulk 1', 'due_date': '2024-12-31'},
+            {'task_name': 'Bulk 2'},
+            {'task_name': 'Bulk 3', 'due_date': '2024-12-31', 'user': self.admin_user.id},
+        ]
+        response = self.client.post('/api/tasks/bulk/', data, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([task['task_name'] for task in response.data['tasks']], ['Bulk 1'])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('due_date', response.data['errors'][0]['errors'])
+        self.assertTrue(Task.objects.filter(task_name='Bulk 1', user=self.regular_user).exists())
+
+    def test_bulk_create_admin_assigns_user(self):
+        data = [
+            {'task_name': 'Assigned', 'due_date': '2024-12-31', 'user': self.regular_user.id},
+            {'task_name': 'Missing user', 'due_date': '2024-12-31', 'user': 999999},
+        ]
+        response = self.client.post('/api/tasks/bulk/', data, HTTP_AUTHORIZATION=f'Bearer {self.admin_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['tasks'][0]['user'], self.regular_user.id)
+        self.assertEqual(response.data['errors'][0]['errors']['detail'], "User with id 999999 does not exist.")
+
+    def test_bulk_create_rejects_non_list(self):
+        response = self.client.post('/api/tasks/bulk/', {'task_name': 'x'}, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test Case 13: Bulk update only reaches the caller's own tasks
+    def test_bulk_update_regular_user(self):
+        data = [
+            {'id': self.task1.id, 'status': 'completed'},
+            {'id': self.task3.id, 'status': 'completed'},
+            {'id': self.task2.id, 'status': 'unknown'},
+        ]
+        response = self.client.patch('/api/tasks/bulk/', data, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.task1.refresh_from_db()
+        self.task3.refresh_from_db()
+        self.assertEqual(self.task1.status, 'completed')
+        self.assertEqual(self.task3.status, 'pending')
+
+    def test_bulk_update_admin_reassign(self):
+        data = [{'id': self.task1.id, 'user': self.admin_user.id}]
+        response = self.client.patch('/api/tasks/bulk/', data, HTTP_AUTHORIZATION=f'Bearer {self.admin_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task1.refresh_from_db()
+        self.assertEqual(self.task1.user, self.admin_user)
+        self.assertTrue(TaskTombstone.objects.filter(task_id=self.task1.id, user=self.regular_user).exists())
+
+    # Test Case 14: Bulk soft delete
+    def test_bulk_destroy(self):
+        data = {'ids': [self.task1.id, self.task2.id, self.task3.id]}
+        response = self.client.delete('/api/tasks/bulk/', data, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['ids'], [self.task1.id, self.task2.id])
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+        self.assertEqual(Task.objects.filter(is_active=True).count(), 1)
+
+    def test_bulk_destroy_counts_only_rows_it_changed(self):
+        raced = []
+
+        def deactivate_first(execute, sql, params, many, context):
+            # Another request soft deletes task1 between the read and the UPDATE
+            if not raced and sql.startswith('UPDATE "tasks_task" SET "is_active"'):
+                raced.append(True)
+                Task.objects.get(pk=self.task1.id).soft_delete()
+            return execute(sql, params, many, context)
+
+        data = {'ids': [self.task1.id, self.task2.id]}
+        with connection.execute_wrapper(deactivate_first):
+            response = self.client.delete(
+                '/api/tasks/bulk/', data, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}'
+            )
+        self.assertEqual(response.data['ids'], [self.task2.id])
+        self.assertEqual(response.data['errors'][0]['index'], 0)
+        stats = get_task_stats()
+        call_command('rebuild_task_summary', stdout=StringIO())
+        self.assertEqual(get_task_stats(), stats)
+
+    # Test Case 15: List pages are cached per user and invalidated on writes
+    def test_task_list_cache_hit(self):
+        auth = f'Bearer {self.regular_user_token}'
+        first = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(second.data, first.data)
+        self.assertFalse(any('tasks_task' in query['sql'] for query in queries.captured_queries))
+
+    def test_task_list_cache_invalidated_on_save_and_soft_delete(self):
+        auth = f'Bearer {self.regular_user_token}'
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 2)
+        self.task1.soft_delete()
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 1)
+        Task.objects.create(task_name="Task 5", due_date=date(2024, 12, 28), user=self.regular_user)
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 2)
+
+    def test_task_list_cache_invalidated_on_reassign(self):
+        auth = f'Bearer {self.regular_user_token}'
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 2)
+        self.client.patch(
+            f'/api/tasks/{self.task1.id}/', {'user': self.admin_user.id},
+            HTTP_AUTHORIZATION=f'Bearer {self.admin_user_token}'
+        )
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 1)
+
+    def test_task_list_cache_invalidated_on_bulk_destroy(self):
+        auth = f'Bearer {self.admin_user_token}'
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 3)
+        self.client.delete('/api/tasks/bulk/', {'ids': [self.task1.id]}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth).data['count'], 2)
+
+    # Test Case 16: Query count and database time are reported per request
+    def test_server_timing_header(self):
+        url = f'/api/tasks/{self.task1.id}/'
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertRegex(response['Server-Timing'], r'^db;desc="\d+ queries";dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'MAX_QUERIES': 1})
+    def test_query_budget_exceeded_is_logged(self):
+        url = f'/api/tasks/{self.task1.id}/'
+        with self.assertLogs('TaskManager.middleware', level='WARNING') as logs:
+            self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertIn(f"GET {url} issued", logs.output[0])
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'MAX_QUERIES': 1})
+    def test_query_budget_per_action(self):
+        auth = f'Bearer {self.admin_user_token}'
+        # Bulk writes have their own budget...
+        with self.assertNoLogs('TaskManager.middleware', level='WARNING'):
+            self.client.delete('/api/tasks/bulk/', {'ids': [self.task1.id]}, HTTP_AUTHORIZATION=auth)
+        # ...while other actions of the viewset keep the default
+        with self.assertLogs('TaskManager.middleware', level='WARNING'):
+            self.client.get('/api/tasks/?page_size=2', HTTP_AUTHORIZATION=auth)
+
+    @override_settings(QUERY_BUDGET={'ENABLED': False})
+    def test_query_budget_disabled(self):
+        response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertNotIn('Server-Timing', response)
+
+    # Test Case 17: Streaming export honours role scoping and filters
+    def test_export_csv_regular_user(self):
+        response = self.client.get('/api/tasks/export/', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,task_name,description,due_date,status,user')
+        self.assertEqual(
+            lines[1], f'{self.task1.id},Task 1,Task 1 description,2024-12-25,pending,{self.regular_user.id}'
+        )
+        self.assertEqual(len(lines), 3)
+
+    def test_export_ndjson_admin_with_filter(self):
+        self.task3.status = 'completed'
+        self.task3.save()
+        response = self.client.get(
+            '/api/tasks/export/?export_format=ndjson&status=completed',
+            HTTP_AUTHORIZATION=f'Bearer {self.admin_user_token}', HTTP_ACCEPT='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{
+            'id': self.task3.id, 'task_name': 'Task 3', 'description': 'Task 3 description',
+            'due_date': '2024-12-27', 'status': 'completed', 'user': self.admin_user.id,
+        }])
+
+    def test_export_format_from_accept_header(self):
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.get('/api/tasks/export/', HTTP_AUTHORIZATION=auth, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.task1.id, self.task2.id])
+
+        response = self.client.get('/api/tasks/export/', HTTP_AUTHORIZATION=auth, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        # The query parameter wins over the Accept header
+        response = self.client.get(
+            '/api/tasks/export/?export_format=csv', HTTP_AUTHORIZATION=auth, HTTP_ACCEPT='application/x-ndjson'
+        )
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+    def test_export_unknown_format(self):
+        response = self.client.get(
+            '/api/tasks/export/?export_format=xml', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_errors_are_json(self):
+        auth = f'Bearer {self.regular_user_token}'
+        for path, headers, expected in [
+            ('/api/tasks/export/?status=bogus', {'HTTP_AUTHORIZATION': auth}, status.HTTP_400_BAD_REQUEST),
+            ('/api/tasks/export/?export_format=xml', {'HTTP_AUTHORIZATION': auth}, status.HTTP_400_BAD_REQUEST),
+            ('/api/tasks/export/', {}, status.HTTP_401_UNAUTHORIZED),
+        ]:
+            for accept in ['text/csv', 'application/x-ndjson', '*/*']:
+                response = self.client.get(path, HTTP_ACCEPT=accept, **headers)
+                self.assertEqual(response.status_code, expected)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIsInstance(response.json(), dict)
+
+    # Test Case 18: Statistics come from the incrementally maintained summary
+    def test_task_stats_regular_user(self):
+        self.task2.status = 'completed'
+        self.task2.save()
+        Task.objects.create(task_name="Old", due_date=date(2024, 12, 1), user=self.regular_user).soft_delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/stats/', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.data['stats']
+        self.assertEqual(stats['by_status'], {'pending': 1, 'completed': 1, 'in_progress': 0})
+        self.assertEqual((stats['active'], stats['inactive']), (2, 1))
+        # task1 is pending and past due; task2 is completed
+        self.assertEqual(stats['overdue'], 1)
+        self.assertFalse(any('"tasks_task"' in query['sql'] for query in queries.captured_queries))
+
+    def test_task_stats_admin_aggregate_and_bulk_paths(self):
+        auth = f'Bearer {self.admin_user_token}'
+        self.client.post('/api/tasks/bulk/', [
+            {'task_name': 'Bulk', 'due_date': '2024-12-31', 'user': self.regular_user.id},
+        ], HTTP_AUTHORIZATION=auth)
+        self.client.patch('/api/tasks/bulk/', [{'id': self.task1.id, 'status': 'in_progress'}], HTTP_AUTHORIZATION=auth)
+        self.client.delete('/api/tasks/bulk/', {'ids': [self.task3.id]}, HTTP_AUTHORIZATION=auth)
+
+        stats = self.client.get('/api/tasks/stats/', HTTP_AUTHORIZATION=auth).data['stats']
+        self.assertEqual(stats['by_status'], {'pending': 2, 'completed': 0, 'in_progress': 1})
+        self.assertEqual((stats['active'], stats['inactive']), (3, 1))
+
+        stats = self.client.get(f'/api/tasks/stats/?user={self.admin_user.id}', HTTP_AUTHORIZATION=auth).data['stats']
+        self.assertEqual((stats['active'], stats['inactive']), (0, 1))
+
+    def test_task_stats_due_this_week(self):
+        today = timezone.localdate()
+        Task.objects.create(task_name="Today", due_date=today, user=self.regular_user)
+        stats = get_task_stats(self.regular_user.id, today=today)
+        self.assertEqual(stats['due_this_week'], 1)
+        self.assertEqual(stats['overdue'], 2)
+
+    def test_rebuild_task_summary_command(self):
+        TaskSummary.objects.update(count=99)
+        call_command('rebuild_task_summary', stdout=StringIO())
+        self.assertEqual(get_task_stats()['active'], 3)
+
+    def test_deleting_user_with_tasks(self):
+        # The cascade deletes the user's buckets too; nothing may recreate them
+        self.regular_user.delete()
+        self.assertFalse(Task.objects.filter(user_id=self.regular_user.id).exists())
+        self.assertFalse(TaskSummary.objects.filter(user_id=self.regular_user.id).exists())
+        self.assertEqual(get_task_stats()['active'], 1)
+
+    def test_missing_bucket_is_not_created_negative(self):
+        TaskSummary.objects.all().delete()
+        Task.objects.filter(pk=self.task1.pk).get().delete()
+        self.assertFalse(TaskSummary.objects.filter(count__lt=0).exists())
+
+    # Test Case 19: Conditional GETs answer 304 while the client's ETag matches
+    def test_retrieve_task_etag(self):
+        url = f'/api/tasks/{self.task1.id}/'
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        self.task1.status = 'completed'
+        self.task1.save()
+        response = self.client.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_changes_with_writes_and_query(self):
+        auth = f'Bearer {self.regular_user_token}'
+        etag = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth)['ETag']
+
+        # Same cache version: same tag, still not modified
+        response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get('/api/tasks/?status=pending', HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.delete('/api/tasks/bulk/', {'ids': [self.task1.id]}, HTTP_AUTHORIZATION=auth)
+        response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_list_not_modified_skips_serialization(self):
+        auth = f'Bearer {self.regular_user_token}'
+        etag = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # The tag comes from the cache version: no task query at all
+        self.assertFalse(any('tasks_task' in query['sql'] for query in queries.captured_queries))
+
+    def test_list_etag_skips_aggregate_query(self):
+        auth = f'Bearer {self.regular_user_token}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.assertFalse(any('MAX(' in query['sql'] for query in queries.captured_queries))
+
+    # Test Case 20: Sparse fieldsets narrow the SQL and the output
+    def test_list_sparse_fields(self):
+        auth = f'Bearer {self.regular_user_token}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?fields=status,id,task_name', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'id': self.task1.id, 'task_name': 'Task 1', 'status': 'pending'})
+        page_sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"description"', page_sql)
+
+        response = self.client.get('/api/tasks/?fields=task_name&cursor=&page_size=1', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['results'], [{'task_name': 'Task 1'}])
+        response = self.client.get(response.data['next'], HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['results'], [{'task_name': 'Task 2'}])
+
+    def test_retrieve_sparse_fields(self):
+        url = f'/api/tasks/{self.task1.id}/?fields=id,status'
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.data['task'], {'id': self.task1.id, 'status': 'pending'})
+
+    def test_unknown_sparse_field_rejected(self):
+        response = self.client.get('/api/tasks/?fields=id,secret', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(response.data['fields']))
+
+    def test_read_serializer_matches_task_serializer(self):
+        Task.objects.create(task_name="No description", due_date=date(2025, 1, 2), user=self.admin_user)
+        tasks = Task.objects.order_by('id')
+        expected = TaskSerializer(tasks, many=True).data
+        serializer = TaskReadSerializer()
+        fast = serializer.to_representation(tasks.values(*serializer.columns))
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(expected))
+
+
+    # Test Case 21: Fast JSON and MessagePack renderers
+    def test_fast_json_renderer_matches_json_renderer(self):
+        data = {
+            'text': 'line\u2028separator', 'when': timezone.now(), 'day': date(2024, 12, 25),
+            'amount': Decimal('1.50'), 'nested': [{'id': 1}, None, True], 1: 'int key',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_fast_json_parser_rejects_invalid_json(self):
+        response = self.client.generic(
+            'POST', '/api/tasks/', '{"task_name": ', content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', response.data['detail'])
+
+    @skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_content_negotiation(self):
+        auth = f'Bearer {self.regular_user_token}'
+        body = msgpack.packb({'task_name': 'Packed', 'due_date': '2025-01-01'})
+        response = self.client.generic(
+            'POST', '/api/tasks/', body, content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack', HTTP_AUTHORIZATION=auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['task']['task_name'], 'Packed')
+
+        response = self.client.get('/api/tasks/', HTTP_ACCEPT='application/msgpack', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(msgpack.unpackb(response.content)['count'], 3)
+
+
+    # Test Case 22: The changes feed returns updates and tombstones since a sync token
+    @patch.object(TaskViewSet, 'changes_sync_lag', timedelta(0))
+    def test_task_changes_feed(self):
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.get('/api/tasks/changes/', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([change['id'] for change in response.data['changes']], [self.task1.id, self.task2.id])
+        self.assertFalse(response.data['changes'][0]['deleted'])
+        self.assertFalse(response.data['has_more'])
+        token = response.data['sync_token']
+
+        response = self.client.get(f'/api/tasks/changes/?since={token}', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['changes'], [])
+
+        self.task2.status = 'completed'
+        self.task2.save()
+        self.task1.soft_delete()
+        Task.objects.create(task_name="Other user's", due_date=date(2025, 1, 1), user=self.admin_user)
+        response = self.client.get(f'/api/tasks/changes/?since={token}&fields=status', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['changes'], [
+            {'id': self.task2.id, 'status': 'completed', 'deleted': False},
+            {'id': self.task1.id, 'deleted': True},
+        ])
+
+    @patch.object(TaskViewSet, 'changes_sync_lag', timedelta(0))
+    def test_task_changes_feed_pages(self):
+        auth = f'Bearer {self.admin_user_token}'
+        seen, url = [], '/api/tasks/changes/?page_size=2'
+        while True:
+            response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+            seen += [change['id'] for change in response.data['changes']]
+            if not response.data['has_more']:
+                break
+            url = f"/api/tasks/changes/?page_size=2&since={response.data['sync_token']}"
+        self.assertEqual(sorted(seen), sorted([self.task1.id, self.task2.id, self.task3.id]))
+
+    def test_task_changes_token_lags_behind_recent_writes(self):
+        auth = f'Bearer {self.regular_user_token}'
+        token = self.client.get('/api/tasks/changes/', HTTP_AUTHORIZATION=auth).data['sync_token']
+        # Changes inside the lag window are sent again rather than risk missing a late commit
+        response = self.client.get(f'/api/tasks/changes/?since={token}', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(len(response.data['changes']), 2)
+
+    def test_task_changes_invalid_token(self):
+        response = self.client.get('/api/tasks/changes/?since=bogus', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "Invalid sync token.")
+
+    @patch.object(TaskViewSet, 'changes_sync_lag', timedelta(0))
+    def test_task_changes_feed_reports_removed_tasks(self):
+        auth = f'Bearer {self.regular_user_token}'
+        admin_auth = f'Bearer {self.admin_user_token}'
+        token = self.client.get('/api/tasks/changes/', HTTP_AUTHORIZATION=auth).data['sync_token']
+        admin_token = self.client.get('/api/tasks/changes/', HTTP_AUTHORIZATION=admin_auth).data['sync_token']
+
+        # Reassigned away, deleted outright, and archived after a soft delete
+        self.client.patch(
+            f'/api/tasks/{self.task1.id}/', {'user': self.admin_user.id}, HTTP_AUTHORIZATION=admin_auth
+        )
+        task2_id = self.task2.id
+        self.task2.delete()
+        self.task3.soft_delete()
+        Task.objects.filter(pk=self.task3.pk).update(updated_at=timezone.now() - timedelta(days=100))
+        call_command('archive_tasks', stdout=StringIO())
+
+        response = self.client.get(f'/api/tasks/changes/?since={token}', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['changes'], [
+            {'id': self.task1.id, 'deleted': True},
+            {'id': task2_id, 'deleted': True},
+        ])
+        # Admins still see the reassigned task, and get tombstones for the others
+        response = self.client.get(f'/api/tasks/changes/?since={admin_token}', HTTP_AUTHORIZATION=admin_auth)
+        self.assertEqual(
+            [(change['id'], change['deleted']) for change in response.data['changes']],
+            [(self.task1.id, False), (task2_id, True), (self.task3.id, True)],
+        )
+
+    @patch.object(TaskViewSet, 'changes_sync_lag', timedelta(0))
+    def test_task_changes_feed_pages_across_tombstones(self):
+        auth = f'Bearer {self.regular_user_token}'
+        token = self.client.get('/api/tasks/changes/', HTTP_AUTHORIZATION=auth).data['sync_token']
+        ids = [self.task1.id, self.task2.id]
+        self.task1.delete()
+        self.task2.status = 'completed'
+        self.task2.save()
+        self.task2.delete()
+
+        seen, url = [], f'/api/tasks/changes/?page_size=1&since={token}'
+        while True:
+            response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+            seen += [(change['id'], change['deleted']) for change in response.data['changes']]
+            if not response.data['has_more']:
+                break
+            url = f"/api/tasks/changes/?page_size=1&since={response.data['sync_token']}"
+        self.assertEqual(seen, [(ids[0], True), (ids[1], True)])
+
+    def test_task_changes_expired_token(self):
+        auth = f'Bearer {self.regular_user_token}'
+        token = self.client.get('/api/tasks/changes/', HTTP_AUTHORIZATION=auth).data['sync_token']
+        with override_settings(TASK_TOMBSTONE_RETENTION_DAYS=0):
+            response = self.client.get(f'/api/tasks/changes/?since={token}', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_prune_tombstones(self):
+        expired, kept = self.task1.id, self.task2.id
+        self.task1.delete()
+        self.task2.delete()
+        TaskTombstone.objects.filter(task_id=expired).update(deleted_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(prune_tombstones(), 1)
+        self.assertEqual(list(TaskTombstone.objects.values_list('task_id', flat=True)), [kept])
+
+
+    # Test Case 23: Reads go to a replica unless the scope was just written to
+    @override_settings(REPLICA_DATABASES=['replica'])
+    def test_list_and_retrieve_read_from_replica_until_write(self):
+        cache.clear()
+        routes = []
+
+        def record(router, model, **hints):
+            # Record where the read would go, but run it on the test database
+            routes.append((model, _read_alias.get()))
+
+        auth = f'Bearer {self.regular_user_token}'
+        with patch.object(ReplicaRouter, 'db_for_read', autospec=True, side_effect=record):
+            self.client.get(f'/api/tasks/{self.task1.id}/', HTTP_AUTHORIZATION=auth)
+            self.assertIn((Task, 'replica'), routes)
+
+            routes.clear()
+            self.client.patch(f'/api/tasks/{self.task1.id}/', {'status': 'completed'}, HTTP_AUTHORIZATION=auth)
+            self.assertNotIn((Task, 'replica'), routes)
+
+            routes.clear()
+            self.client.get('/api/tasks/', HTTP_AUTHORIZATION=auth)
+            self.assertEqual({alias for model, alias in routes if model is Task}, {None})
+        self.assertTrue(is_pinned(f'user:{self.regular_user.id}'))
+        self.assertTrue(is_pinned('all'))
+
+    @override_settings(REPLICA_DATABASES=['replica'])
+    def test_replica_router(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Task))
+        with replica_reads('user:1'):
+            self.assertEqual(router.db_for_read(Task), 'replica')
+            self.assertEqual(router.db_for_write(Task), 'default')
+        self.assertIsNone(router.db_for_read(Task))
+
+
+    # Test Case 24: Old soft-deleted tasks move to the archive and can be restored
+    def test_archive_and_restore(self):
+        self.task1.soft_delete()
+        self.task3.soft_delete()
+        Task.objects.filter(pk=self.task1.pk).update(updated_at=timezone.now() - timedelta(days=100))
+        out = StringIO()
+        call_command('archive_tasks', '--days', '90', '--batch-size', '1', stdout=out)
+        self.assertIn("Archived 1 task(s)", out.getvalue())
+        self.assertFalse(Task.objects.filter(pk=self.task1.pk).exists())
+        self.assertTrue(Task.objects.filter(pk=self.task3.pk).exists())
+        self.assertEqual(get_task_stats()['inactive'], 1)
+
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.get('/api/archived-tasks/', HTTP_AUTHORIZATION=auth)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task1.id])
+        response = self.client.post(f'/api/archived-tasks/{self.task1.id}/restore/', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task']['id'], self.task1.id)
+
+        restored = Task.objects.get(pk=self.task1.pk)
+        self.assertTrue(restored.is_active)
+        self.assertEqual(restored.created_at, self.task1.created_at)
+        self.assertFalse(ArchivedTask.objects.exists())
+        stats = get_task_stats()
+        call_command('rebuild_task_summary', stdout=StringIO())
+        self.assertEqual(get_task_stats(), stats)
+
+    def test_archive_and_restore_keep_feed_and_events(self):
+        self.task1.soft_delete()
+        Task.objects.filter(pk=self.task1.pk).update(updated_at=timezone.now() - timedelta(days=100))
+        call_command('archive_tasks', stdout=StringIO())
+        self.assertTrue(TaskTombstone.objects.filter(task_id=self.task1.id, user=self.regular_user).exists())
+
+        with patch('tasks.events.get_broker') as get_broker, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f'/api/archived-tasks/{self.task1.id}/restore/', HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}'
+            )
+        event, user_ids = get_broker.return_value.publish.call_args.args
+        self.assertEqual((event['type'], event['task']['id']), ('task.created', self.task1.id))
+        self.assertEqual(user_ids, {self.regular_user.id})
+
+    def test_archive_batch_query_count(self):
+        # Summary, tombstones and cache are updated once per batch, not per row
+        old = timezone.now() - timedelta(days=100)
+        Task.objects.bulk_create([
+            Task(task_name=f"Old {n}", due_date=date(2024, 12, 1 + n % 20), is_active=False,
+                 user=(self.regular_user, self.admin_user)[n % 2])
+            for n in range(200)
+        ])
+        Task.objects.filter(is_active=False).update(updated_at=old)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(archive_inactive_tasks(old + timedelta(days=1))), [200])
+        self.assertLessEqual(len(queries), 15)
+        self.assertEqual(TaskTombstone.objects.count(), 200)
+        stats = get_task_stats()
+        call_command('rebuild_task_summary', stdout=StringIO())
+        self.assertEqual(get_task_stats(), stats)
+
+    def test_archived_tasks_scoped_to_owner(self):
+        self.task3.soft_delete()
+        Task.objects.filter(pk=self.task3.pk).update(updated_at=timezone.now() - timedelta(days=100))
+        call_command('archive_tasks', stdout=StringIO())
+        auth = f'Bearer {self.regular_user_token}'
+        self.assertEqual(self.client.get('/api/archived-tasks/', HTTP_AUTHORIZATION=auth).data['count'], 0)
+        response = self.client.post(f'/api/archived-tasks/{self.task3.id}/restore/', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+    # Test Case 25: A batch runs several calls as the authenticated user
+    def test_batch_runs_operations_in_order(self):
+        operations = [
+            {'method': 'GET', 'path': f'/api/tasks/{self.task1.id}/?fields=id,status'},
+            {'method': 'PATCH', 'path': f'/api/tasks/{self.task1.id}/', 'body': {'status': 'completed'}},
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {'task_name': 'New', 'due_date': '2025-01-10'}},
+            {'method': 'GET', 'path': f'/api/tasks/{self.task3.id}/'},
+            {'method': 'GET', 'path': '/api/tasks/?status=completed'},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'operations': []}},
+        ]
+        response = self.client.post(
+            '/api/batch/', {'operations': operations}, format='json',
+            HTTP_AUTHORIZATION=f'Bearer {self.regular_user_token}',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [200, 200, 201, 403, 200, 404, 400])
+        self.assertEqual(results[0]['body']['task'], {'id': self.task1.id, 'status': 'pending'})
+        self.assertEqual(results[2]['body']['task']['user'], self.regular_user.id)
+        self.assertEqual([task['id'] for task in results[4]['body']['results']], [self.task1.id])
+        self.assertEqual(Task.objects.get(pk=self.task1.pk).status, 'completed')
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        operations = [
+            {'method': 'PATCH', 'path': f'/api/tasks/{self.task1.id}/', 'body': {'status': 'completed'}},
+            {'method': 'DELETE', 'path': f'/api/tasks/{self.task3.id}/'},
+            {'method': 'DELETE', 'path': f'/api/tasks/{self.task2.id}/'},
+        ]
+        auth = f'Bearer {self.regular_user_token}'
+        response = self.client.post(
+            '/api/batch/', {'operations': operations, 'atomic': True}, format='json', HTTP_AUTHORIZATION=auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "Operation 1 failed; no changes were made.")
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(Task.objects.get(pk=self.task1.pk).status, 'pending')
+        self.assertTrue(Task.objects.get(pk=self.task2.pk).is_active)
+
+        with patch('tasks.batch.BatchView.max_operations', 2):
+            response = self.client.post(
+                '/api/batch/', {'operations': operations}, format='json', HTTP_AUTHORIZATION=auth
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('operations', response.data)
+        self.assertEqual(
+            self.client.post('/api/batch/', {'operations': operations[:1]}, format='json').status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    # Test Case 26: Full-text search, ranked and combined with filters and scoping
+    def test_search_tasks(self):
+        self.task1.task_name = "Quarterly report"
+        self.task1.description = "Draft the quarterly report for finance"
+        self.task1.save()
+        self.task2.description = "Review the report"
+        self.task2.save()
+        self.task3.task_name = "Report for admins"
+        self.task3.save()
+        auth = f'Bearer {self.regular_user_token}'
+
+        response = self.client.get('/api/tasks/', {'search': 'report'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The task mentioning "report" most often ranks first; the admin's task is out of scope
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task1.id, self.task2.id])
+
+        response = self.client.get('/api/tasks/', {'search': 'quart'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task1.id])
+
+        self.client.patch(f'/api/tasks/{self.task2.id}/', {'status': 'completed'}, HTTP_AUTHORIZATION=auth)
+        response = self.client.get(
+            '/api/tasks/', {'search': 'report', 'status': 'completed'}, HTTP_AUTHORIZATION=auth
+        )
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task2.id])
+
+        # Query syntax in user input is searched for as plain words
+        response = self.client.get('/api/tasks/', {'search': 'report" OR (NEAR'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/tasks/', {'search': '***'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['results'], [])
+
+        # The index follows renames and deletions, including raw ones
+        self.client.patch(f'/api/tasks/{self.task1.id}/', {'task_name': 'Budget'}, HTTP_AUTHORIZATION=auth)
+        Task.objects.filter(pk=self.task2.pk).delete()
+        response = self.client.get('/api/tasks/', {'search': 'budget'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task1.id])
+        response = self.client.get('/api/tasks/', {'search': 'review'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.data['results'], [])
+
+class ExplainTaskQueriesCommandTests(TestCase):
+
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            username="admin", email="admin@example.com", password="adminpass", role="admin"
+        )
+        self.regular_user = User.objects.create_user(
+            username="user", email="user@example.com", password="userpass", role="regular"
+        )
+        Task.objects.create(task_name="Task 1", due_date=date(2024, 12, 25), user=self.regular_user)
+
+    def test_prints_plan_for_each_viewset_query(self):
+        out = StringIO()
+        call_command('explain_task_queries', stdout=out)
+        output = out.getvalue()
+        for label in ("list (regular)", "list (admin)", "retrieve", "update / destroy (regular)"):
+            self.assertIn(label, output)
+
+    def test_unknown_user_is_an_error(self):
+        with self.assertRaises(CommandError):
+            call_command('explain_task_queries', user='nobody', stdout=StringIO())
+
+
+class SeedAndBenchmarkCommandTests(TestCase):
+
+    def test_seed_then_benchmark(self):
+        call_command('seed_tasks', users=3, admins=1, tasks=40, batch_size=15, seed=1, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 4)
+        self.assertEqual(Task.objects.count(), 40)
+
+        out = StringIO()
+        call_command('benchmark_tasks', admin=True, iterations=3, warmup=1, seed=1, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['results']), {'list', 'filtered_list', 'retrieve', 'create', 'update', 'destroy'})
+        for result in report['results'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        # Tasks created by the benchmark are deleted again, leaving no trace in the feed or the summary
+        self.assertEqual(Task.objects.count(), 40)
+        self.assertFalse(TaskTombstone.objects.exists())
+        stats = get_task_stats()
+        call_command('rebuild_task_summary', stdout=StringIO())
+        self.assertEqual(get_task_stats(), stats)
+
+    def test_seed_refuses_existing_prefix(self):
+        call_command('seed_tasks', users=1, admins=0, tasks=1, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_tasks', users=1, admins=0, tasks=1, stdout=StringIO())
+
+
+class ImportTasksCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user", email="User@example.com", password="userpass", role="regular"
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_import_csv_with_rejects(self):
+        path = self._write('tasks.csv', (
+            "task_name,description,due_date,status,user\n"
+            "Imported 1,,2024-12-25,pending,user\n"
+            "Imported 2,Desc,2024-12-26,completed,user@example.com\n"
+            "Bad date,,not-a-date,pending,user\n"
+            "Bad user,,2024-12-26,pending,nobody\n"
+        ))
+        rejects = os.path.join(self.directory.name, 'rejects.ndjson')
+        out = StringIO()
+        call_command('import_tasks', path, batch_size=2, rejects=rejects, stdout=out)
+
+        self.assertEqual(list(Task.objects.values_list('task_name', 'status')),
+                         [('Imported 1', 'pending'), ('Imported 2', 'completed')])
+        self.assertTrue(all(task.user_id == self.user.id for task in Task.objects.all()))
+        with open(rejects) as f:
+            self.assertEqual([json.loads(line)['row'] for line in f], [3, 4])
+        self.assertIn("Imported 2 tasks, rejected 2 rows", out.getvalue())
+
+    def test_import_user_resolution(self):
+        User.objects.create_user(username="noemail", password="pass")
+        # Another account's username that looks like the first user's email
+        squatter = User.objects.create_user(username="user@example.com", email="squatter@example.com", password="pass")
+        path = self._write('tasks.ndjson', ''.join(json.dumps(row) + '\n' for row in [
+            {'task_name': 'By username', 'due_date': '2024-12-25', 'user': 'user@example.com'},
+            {'task_name': 'No user', 'due_date': '2024-12-25', 'user': ''},
+            {'task_name': 'Missing user', 'due_date': '2024-12-25'},
+        ]))
+        rejects = os.path.join(self.directory.name, 'rejects.ndjson')
+        call_command('import_tasks', path, rejects=rejects, stdout=StringIO())
+
+        self.assertEqual(list(Task.objects.values_list('task_name', 'user_id')), [('By username', squatter.id)])
+        with open(rejects) as f:
+            self.assertEqual([json.loads(line)['errors'] for line in f], [{'user': 'This field is required.'}] * 2)
+
+    def test_import_ndjson_resumes_from_checkpoint(self):
+        rows = [{'task_name': f'Task {i}', 'due_date': '2024-12-25', 'user': 'user'} for i in range(5)]
+        path = self._write('tasks.ndjson', ''.join(json.dumps(row) + '\n' for row in rows))
+        checkpoint = self._write('checkpoint.json', json.dumps({'offset': 3}))
+
+        call_command('import_tasks', path, checkpoint=checkpoint, stdout=StringIO())
+
+        self.assertEqual(list(Task.objects.values_list('task_name', flat=True)), ['Task 3', 'Task 4'])
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f), {'offset': 5})
+
+
+class AsyncTaskViewTests(TestCase):
+    """The async endpoints answer exactly like TaskViewSet."""
+
+    def setUp(self):
+        user_state_cache.clear()
+        self.admin_user = User.objects.create_user(
+            username="admin", email="admin@example.com", password="adminpass", role="admin"
+        )
+        self.regular_user = User.objects.create_user(
+            username="user", email="user@example.com", password="userpass", role="regular"
+        )
+        self.task1 = Task.objects.create(task_name="Task 1", due_date=date(2024, 12, 25), user=self.regular_user)
+        self.task3 = Task.objects.create(task_name="Task 3", due_date=date(2024, 12, 27), user=self.admin_user)
+        self.client = AsyncClient()
+        self.regular_auth = f'Bearer {RoleRefreshToken.for_user(self.regular_user).access_token}'
+        self.admin_auth = f'Bearer {RoleRefreshToken.for_user(self.admin_user).access_token}'
+
+    async def test_list_scoped_to_user(self):
+        response = await self.client.get('/api/async/tasks/', headers={'Authorization': self.regular_auth})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['id'], self.task1.id)
+        # The query budget middleware runs natively on the async path too
+        self.assertIn('Server-Timing', response)
+
+    async def test_list_rejects_unknown_status(self):
+        response = await self.client.get('/api/async/tasks/?status=bogus', headers={'Authorization': self.admin_auth})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_requires_authentication(self):
+        response = await self.client.get('/api/async/tasks/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_retrieve_other_users_task_forbidden(self):
+        response = await self.client.get(f'/api/async/tasks/{self.task3.id}/', headers={'Authorization': self.regular_auth})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['detail'], "You are not authorized to view this task.")
+
+    async def test_create_update_destroy(self):
+        response = await self.client.post(
+            '/api/async/tasks/', {'task_name': 'Async', 'due_date': '2024-12-31'},
+            content_type='application/json', headers={'Authorization': self.regular_auth},
+        )
+        self.assertEqual(response.status_code, 201)
+        task_id = response.json()['task']['id']
+        self.assertEqual(response.json()['task']['user'], self.regular_user.id)
+
+        response = await self.client.patch(
+            f'/api/async/tasks/{task_id}/', {'status': 'completed'},
+            content_type='application/json', headers={'Authorization': self.regular_auth},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task']['status'], 'completed')
+
+        response = await self.client.delete(f'/api/async/tasks/{task_id}/', headers={'Authorization': self.regular_auth})
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Task.objects.filter(pk=task_id, is_active=True).aexists())
+
+    async def test_regular_user_cannot_create_for_another_user(self):
+        response = await self.client.post(
+            '/api/async/tasks/', {'task_name': 'Async', 'due_date': '2024-12-31', 'user': self.admin_user.id},
+            content_type='application/json', headers={'Authorization': self.regular_auth},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_admin_reassign(self):
+        response = await self.client.patch(
+            f'/api/async/tasks/{self.task1.id}/', {'user': self.admin_user.id},
+            content_type='application/json', headers={'Authorization': self.admin_auth},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task']['user'], self.admin_user.id)
+        self.assertTrue(
+            await TaskTombstone.objects.filter(task_id=self.task1.id, user=self.regular_user, reassigned=True).aexists()
+        )
+
+
+class TaskEventTests(TestCase):
+    """Task changes are pushed to the owner and to admins."""
+
+    def setUp(self):
+        user_state_cache.clear()
+        self.admin_user = User.objects.create_user(
+            username="admin", email="admin@example.com", password="adminpass", role="admin"
+        )
+        self.regular_user = User.objects.create_user(
+            username="user", email="user@example.com", password="userpass", role="regular"
+        )
+        self.other_user = User.objects.create_user(
+            username="other", email="other@example.com", password="otherpass", role="regular"
+        )
+        self.task1 = Task.objects.create(task_name="Task 1", due_date=date(2024, 12, 25), user=self.regular_user)
+
+    async def test_broker_routes_to_owner_and_admins(self):
+        broker = InMemoryBroker(max_buffer=2)
+        owner = broker.subscribe(self.regular_user.id)
+        admin = broker.subscribe(self.admin_user.id, is_admin=True)
+        other = broker.subscribe(self.other_user.id)
+        broker.publish({"type": "task.updated", "task": {"id": 1}}, {self.regular_user.id})
+        await asyncio.sleep(0)
+        self.assertEqual(await owner.get(), {"type": "task.updated", "task": {"id": 1}})
+        self.assertEqual(len(admin.buffer), 1)
+        self.assertEqual(len(other.buffer), 0)
+
+        # A connection more than max_buffer events behind is cut off
+        for pk in range(3):
+            broker.publish({"type": "task.updated", "task": {"id": pk}}, {self.regular_user.id})
+        await asyncio.sleep(0)
+        with self.assertRaises(Overflow):
+            await owner.get()
+
+    async def test_connection_limit(self):
+        broker = InMemoryBroker(max_connections_per_user=1)
+        subscription = broker.subscribe(self.regular_user.id)
+        with self.assertRaises(TooManyConnections):
+            broker.subscribe(self.regular_user.id)
+        broker.unsubscribe(subscription)
+        broker.subscribe(self.regular_user.id)
+
+    def test_viewset_writes_publish_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        with patch('tasks.events.get_broker') as get_broker, self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/tasks/{self.task1.id}/', {'user': self.other_user.id})
+            client.delete('/api/tasks/bulk/', {'ids': [self.task1.id]})
+        calls = get_broker.return_value.publish.call_args_list
+        self.assertEqual(calls[0].args[0]['type'], 'task.updated')
+        self.assertEqual(calls[0].args[1], {self.regular_user.id, self.other_user.id})
+        self.assertEqual(calls[1].args, (
+            {"type": "task.deactivated", "task": {"id": self.task1.id, "user": self.other_user.id}},
+            {self.other_user.id},
+        ))
+
+    def test_async_writes_publish_after_commit(self):
+        # Called from this thread, so the views' ORM calls share the test transaction
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {RoleRefreshToken.for_user(self.admin_user).access_token}'}
+        with patch('tasks.events.get_broker') as get_broker, self.captureOnCommitCallbacks(execute=True):
+            response = async_to_sync(client.post)(
+                '/api/async/tasks/', {'task_name': 'Async', 'due_date': '2024-12-31'},
+                content_type='application/json', headers=headers,
+            )
+            async_to_sync(client.patch)(
+                f'/api/async/tasks/{self.task1.id}/', {'user': self.other_user.id},
+                content_type='application/json', headers=headers,
+            )
+            async_to_sync(client.delete)(f'/api/async/tasks/{self.task1.id}/', headers=headers)
+        calls = get_broker.return_value.publish.call_args_list
+        self.assertEqual([call.args[0]['type'] for call in calls], ['task.created', 'task.updated', 'task.deactivated'])
+        self.assertEqual(calls[0].args[0]['task']['id'], response.json()['task']['id'])
+        self.assertEqual(calls[1].args[1], {self.regular_user.id, self.other_user.id})
+
+    def test_form_data_create_reaches_owner(self):
+        # Multipart values are strings; the owner's int-keyed subscription must still match
+        broker = InMemoryBroker()
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def subscribe():
+            return broker.subscribe(self.regular_user.id)
+
+        subscription = loop.run_until_complete(subscribe())
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        with patch('tasks.events.get_broker', return_value=broker), self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/tasks/', {
+                'task_name': 'Form', 'due_date': '2024-12-31', 'user': str(self.regular_user.id),
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        event = loop.run_until_complete(asyncio.wait_for(subscription.get(), 1))
+        self.assertEqual(event['type'], 'task.created')
+        self.assertEqual(event['task']['user'], self.regular_user.id)
+
+    async def test_event_stream(self):
+        token = RoleRefreshToken.for_user(self.regular_user).access_token
+        response = await AsyncClient().get(f'/api/async/tasks/events/?token={token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        get_broker().publish({"type": "task.created", "task": {"id": 5, "user": self.regular_user.id}},
+                             {self.regular_user.id})
+        self.assertEqual(
+            await anext(stream), f'event: task.created\ndata: {{"id": 5, "user": {self.regular_user.id}}}\n\n'.encode()
+        )
+        await stream.aclose()
+        response.close()
+
+    async def test_event_stream_requires_authentication(self):
+        response = await AsyncClient().get('/api/async/tasks/events/?token=bogus')
+        self.assertEqual(response.status_code, 401)
+
+
+class RecordingNotifier:
+    """Test notifier: remembers task ids, fails for tasks named "Broken"."""
+    notified = []
+
+    def notify(self, task):
+        if task.task_name == "Broken":
+            raise RuntimeError("unreachable mail server")
+        self.notified.append(task.pk)
+
+
+@override_settings(OVERDUE_SWEEP={'NOTIFIER': 'tasks.tests.RecordingNotifier', 'WORKERS': 2, 'BATCH_SIZE': 2})
+class SweepOverdueCommandTests(TestCase):
+
+    def setUp(self):
+        RecordingNotifier.notified = []
+        self.user = User.objects.create_user(username="user", email="user@example.com", password="userpass")
+        self.today = timezone.localdate()
+        self.overdue = [
+            Task.objects.create(task_name=f"Overdue {days}", due_date=self.today - timedelta(days=days), user=self.user)
+            for days in (3, 2, 1)
+        ]
+        Task.objects.create(task_name="Done", due_date=self.today - timedelta(days=5), user=self.user, status='completed')
+        Task.objects.create(task_name="Deleted", due_date=self.today - timedelta(days=5), user=self.user, is_active=False)
+        self.due_today = Task.objects.create(task_name="Due today", due_date=self.today, user=self.user)
+
+    def test_sweeps_open_overdue_tasks_once(self):
+        out = StringIO()
+        call_command('sweep_overdue', stdout=out)
+        self.assertEqual(sorted(RecordingNotifier.notified), sorted(task.pk for task in self.overdue))
+        self.assertIn("Notified 3 overdue task(s)", out.getvalue())
+
+        # The checkpoint keeps handled rows from being notified again
+        RecordingNotifier.notified = []
+        call_command('sweep_overdue', stdout=StringIO())
+        self.assertEqual(RecordingNotifier.notified, [])
+
+        # ...but tasks that became overdue since are picked up
+        late = Task.objects.create(task_name="Late", due_date=self.today, user=self.user)
+        OverdueSweeper().run(today=self.today + timedelta(days=1))
+        self.assertEqual(sorted(RecordingNotifier.notified), [self.due_today.pk, late.pk])
+
+        RecordingNotifier.notified = []
+        call_command('sweep_overdue', '--reset', stdout=StringIO())
+        self.assertEqual(len(RecordingNotifier.notified), 3)
+
+    def test_notifier_failures_are_retried(self):
+        broken = Task.objects.create(task_name="Broken", due_date=self.today - timedelta(days=1), user=self.user)
+        with self.assertLogs('tasks.sweeper', level='ERROR'):
+            notified, failed = OverdueSweeper().run()
+        self.assertEqual((notified, failed), (3, 1))
+
+        # The failed task is retried by the next sweep, and only it
+        with self.assertLogs('tasks.sweeper', level='ERROR'):
+            self.assertEqual(OverdueSweeper().run(), (0, 1))
+        broken.task_name = "Fixed"
+        broken.save()
+        RecordingNotifier.notified = []
+        self.assertEqual(OverdueSweeper().run(), (1, 0))
+        self.assertEqual(RecordingNotifier.notified, [broken.pk])
+        self.assertEqual(OverdueSweeper().run(), (0, 0))
+        self.assertEqual(SweepCheckpoint.objects.get().failed_tasks, {})
+
+    def test_failed_notifications_are_bounded(self):
+        broken = [
+            Task.objects.create(task_name="Broken", due_date=self.today - timedelta(days=1), user=self.user)
+            for _ in range(2)
+        ]
+        config = {'NOTIFIER': 'tasks.tests.RecordingNotifier', 'BATCH_SIZE': 2, 'MAX_ATTEMPTS': 2, 'MAX_FAILED': 1}
+        with override_settings(OVERDUE_SWEEP=config), self.assertLogs('tasks.sweeper', level='ERROR') as logs:
+            self.assertEqual(OverdueSweeper().run(), (3, 2))
+        # Only one failure fits; the other is logged and dropped
+        self.assertEqual(SweepCheckpoint.objects.get().failed_tasks, {str(broken[0].pk): 1})
+        self.assertTrue(any("will not be retried" in line for line in logs.output))
+
+        with override_settings(OVERDUE_SWEEP=config), self.assertLogs('tasks.sweeper', level='ERROR') as logs:
+            self.assertEqual(OverdueSweeper().run(), (0, 1))
+        self.assertEqual(SweepCheckpoint.objects.get().failed_tasks, {})
+        self.assertTrue(any("Giving up on overdue task" in line for line in logs.output))
+        with override_settings(OVERDUE_SWEEP=config):
+            self.assertEqual(OverdueSweeper().run(), (0, 0))
+
+
+class TaskAdminTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="root", email="root@example.com", password="rootpass")
+        self.user = User.objects.create_user(username="user", email="user@example.com", password="userpass")
+        self.other = User.objects.create_user(username="other", email="other@example.com", password="otherpass")
+        self.tasks = [
+            Task.objects.create(task_name=f"Task {i}", due_date=date(2024, 12, 25 + i), user=self.user)
+            for i in range(3)
+        ]
+        self.client.force_login(self.admin)
+        self.url = '/admin/tasks/task/'
+
+    def run_action(self, action, tasks, **extra):
+        data = {'action': action, '_selected_action': [task.pk for task in tasks], **extra}
+        return self.client.post(self.url, data, follow=True)
+
+    def assert_summary_consistent(self):
+        stats = {user.pk: get_task_stats(user.pk) for user in (self.user, self.other)}
+        call_command('rebuild_task_summary', stdout=StringIO())
+        self.assertEqual({user.pk: get_task_stats(user.pk) for user in (self.user, self.other)}, stats)
+
+    def test_changelist_skips_full_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'status__exact': 'pending'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertIsNone(response.context['cl'].full_result_count)
+        counts = [query['sql'] for query in ctx.captured_queries if 'COUNT(' in query['sql']]
+        self.assertEqual(len(counts), 1)
+        self.assertIn('LIMIT', counts[0])
+
+    def test_paginator_uses_estimate_for_unfiltered_lists(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            cursor.execute("UPDATE sqlite_stat1 SET stat = '50000 1' WHERE tbl = %s", [Task._meta.db_table])
+        self.assertEqual(EstimatedCountPaginator(Task.objects.all(), 100).count, 50000)
+        self.assertEqual(EstimatedCountPaginator(Task.objects.filter(status='pending'), 100).count, 3)
+        with patch.object(EstimatedCountPaginator, 'count_limit', 2):
+            self.assertEqual(EstimatedCountPaginator(Task.objects.filter(status='pending'), 100).count, 2)
+
+    def test_complete_and_deactivate_actions(self):
+        before = Task.objects.get(pk=self.tasks[0].pk).updated_at
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_action('complete', self.tasks[:2])
+        updates = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Task.objects.filter(status='completed').count(), 2)
+        self.assertGreater(Task.objects.get(pk=self.tasks[0].pk).updated_at, before)
+
+        self.run_action('deactivate', self.tasks[1:])
+        self.assertEqual(Task.objects.filter(is_active=False).count(), 2)
+        self.assertEqual(get_task_stats(self.user.pk)['inactive'], 2)
+        self.assert_summary_consistent()
+
+    def test_actions_publish_events(self):
+        with patch('tasks.events.get_broker') as get_broker, self.captureOnCommitCallbacks(execute=True):
+            self.run_action('reassign', self.tasks[:1], reassign_to=self.other.pk)
+            self.run_action('deactivate', self.tasks[1:2])
+            # Nothing is serialized or published before the commit
+            self.assertFalse(get_broker.return_value.publish.called)
+        calls = get_broker.return_value.publish.call_args_list
+        self.assertEqual(calls[0].args[0]['type'], 'task.updated')
+        self.assertEqual(calls[0].args[0]['task']['user'], self.other.pk)
+        self.assertEqual(calls[0].args[1], {self.user.pk, self.other.pk})
+        self.assertEqual(calls[1].args, (
+            {"type": "task.deactivated", "task": {"id": self.tasks[1].pk, "user": self.user.pk}}, {self.user.pk},
+        ))
+
+    def test_action_events_published_in_batches(self):
+        with patch.object(TaskAdmin, 'event_batch_size', 2), patch('tasks.events.get_broker') as get_broker, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.run_action('complete', self.tasks)
+        calls = get_broker.return_value.publish.call_args_list
+        self.assertEqual(sorted(call.args[0]['task']['id'] for call in calls), sorted(task.pk for task in self.tasks))
+        self.assertTrue(all(call.args[0]['task']['status'] == 'completed' for call in calls))
+
+    def test_reassign_action(self):
+        self.run_action('reassign', self.tasks[:2], reassign_to=self.other.pk)
+        self.assertEqual(Task.objects.filter(user=self.other).count(), 2)
+        self.assertEqual(get_task_stats(self.other.pk)['active'], 2)
+        self.assert_summary_consistent()
+        self.assertEqual(
+            set(TaskTombstone.objects.values_list('task_id', 'user_id')), {(task.pk, self.user.pk) for task in self.tasks[:2]}
+        )
+
+        response = self.run_action('reassign', self.tasks[2:], reassign_to=999999)
+        self.assertContains(response, "Enter the id of an existing user")
+        self.assertEqual(Task.objects.get(pk=self.tasks[2].pk).user, self.user)
+
+
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", email="user@example.com", password="userpass")
+        Task.objects.create(task_name="Task", due_date=date(2024, 12, 25), user=self.user)
+        self.auth = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def profiling(self, **config):
+        return override_settings(PROFILING={'ENABLED': True, 'DIRECTORY': self.directory, 'MAX_PROFILES': 2, **config})
+
+    def test_signed_header_profiles_request(self):
+        with self.profiling():
+            response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=self.auth)
+            self.assertNotIn('X-Profile-Id', response)
+            response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=self.auth, HTTP_X_PROFILE='profile:forged')
+            self.assertNotIn('X-Profile-Id', response)
+            response = self.client.get(
+                '/api/tasks/', HTTP_AUTHORIZATION=self.auth, HTTP_X_PROFILE=make_profile_token()
+            )
+        profile_id = response['X-Profile-Id']
+        store = ProfileStore(self.directory)
+        self.assertEqual(store.ids(), [profile_id])
+        profile = store.load(profile_id)
+        self.assertEqual((profile['method'], profile['endpoint'], profile['status']), ('GET', 'task-list', 200))
+        stacks = store.path(profile_id, '.collapsed').read_text()
+        self.assertIn('list (views.py:', stacks)
+
+        with self.profiling():
+            out = StringIO()
+            call_command('profiles', stdout=out)
+            self.assertIn('task-list', out.getvalue())
+            out = StringIO()
+            call_command('profiles', '--show', profile_id, '--limit', '5', stdout=out)
+            self.assertIn('function calls', out.getvalue())
+            with self.assertRaises(CommandError):
+                call_command('profiles', '--endpoint', 'task-detail', stdout=StringIO())
+
+    def test_sampled_profiles_are_a_ring_buffer(self):
+        with self.profiling(SAMPLE_RATE=1.0):
+            ids = [
+                self.client.get('/api/tasks/', HTTP_AUTHORIZATION=self.auth)['X-Profile-Id'] for _ in range(3)
+            ]
+        self.assertEqual(ProfileStore(self.directory).ids(), ids[1:])
+        self.assertEqual(len(os.listdir(self.directory)), 6)
+
+    def test_collapsed_stacks_split_shared_callees(self):
+        def leaf():
+            sum(range(20000))
+
+        def a():
+            leaf()
+
+        def b():
+            leaf()
+            leaf()
+
+        profiler = cProfile.Profile()
+        profiler.runcall(lambda: (a(), b()))
+        stacks = {}
+        for line in collapsed_stacks(pstats.Stats(profiler)):
+            stack, micros = line.rsplit(' ', 1)
+            stacks[stack] = int(micros)
+        a_leaf = sum(v for k, v in stacks.items() if ';a (' in k and 'leaf (' in k)
+        b_leaf = sum(v for k, v in stacks.items() if ';b (' in k and 'leaf (' in k)
+        self.assertGreater(a_leaf, 0)
+        self.assertGreater(b_leaf, a_leaf)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", email="user@example.com", password="userpass")
+        Task.objects.create(task_name="Task", due_date=date(2024, 12, 25), user=self.user)
+        self.auth = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def sample(self, text, name, **labels):
+        prefix = name + '{' + ','.join(f'{key}="{value}"' for key, value in labels.items())
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(' ', 1)[1])
+        return 0
+
+    def test_requests_recorded_by_view_and_action(self):
+        before = self.client.get('/metrics').content.decode()
+        self.client.get('/api/tasks/', HTTP_AUTHORIZATION=self.auth)
+        self.client.get('/api/tasks/', HTTP_AUTHORIZATION=self.auth)
+        self.client.post('/api/users/register_user/', {}, content_type='application/json')
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        after = response.content.decode()
+
+        def delta(name, **labels):
+            return self.sample(after, name, **labels) - self.sample(before, name, **labels)
+
+        view = {'view': 'tasks.views.TaskViewSet', 'action': 'list'}
+        self.assertEqual(delta('taskmanager_http_requests_total', **view, method='GET', status=200), 2)
+        self.assertEqual(delta('taskmanager_http_request_duration_seconds_count', **view, method='GET'), 2)
+        self.assertEqual(
+            delta('taskmanager_http_request_duration_seconds_bucket', **view, method='GET', le='+Inf'), 2
+        )
+        self.assertEqual(delta('taskmanager_http_request_db_queries_count', **view), 2)
+        self.assertEqual(delta(
+            'taskmanager_http_requests_total',
+            view='users.views.registration_view', action='post', method='POST', status=400,
+        ), 1)
+
+    def test_unknown_methods_share_one_label(self):
+        before = self.client.get('/metrics').content.decode()
+        self.client.generic('BREW', '/api/tasks/', HTTP_AUTHORIZATION=self.auth)
+        self.client.generic('PROPFIND', '/api/tasks/', HTTP_AUTHORIZATION=self.auth)
+        after = self.client.get('/metrics').content.decode()
+        labels = {'view': 'tasks.views.TaskViewSet', 'action': 'other', 'method': 'other', 'status': 405}
+        self.assertEqual(
+            self.sample(after, 'taskmanager_http_requests_total', **labels)
+            - self.sample(before, 'taskmanager_http_requests_total', **labels), 2
+        )
+        self.assertNotIn('BREW', after)
+
+    @override_settings(METRICS={'ENABLED': True, 'TOKEN': 'scrape-secret'})
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_multiprocess_files_are_added_up(self):
+        metrics = [
+            MetricCounter('requests_total', "Requests.", ['view']),
+            Histogram('latency_seconds', "Latency.", ['view'], [0.1, 1]),
+        ]
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS={'ENABLED': True, 'MULTIPROCESS_DIR': directory, 'FLUSH_INTERVAL': 60}
+        ):
+            # Two registries stand in for two worker processes
+            workers = [Registry(metrics), Registry(metrics)]
+            for worker, latency in zip(workers, (0.05, 2)):
+                worker.record('requests_total', {'view': 'a"b'}, 1)
+                worker.record('latency_seconds', {'view': 'a"b'}, latency)
+            workers[1].flush()
+            text = workers[0].render()
+        self.assertIn('requests_total{view="a\\"b"} 2', text)
+        self.assertIn('latency_seconds_bucket{view="a\\"b",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{view="a\\"b",le="1"} 1', text)
+        self.assertIn('latency_seconds_bucket{view="a\\"b",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_count{view="a\\"b"} 2', text)
+        self.assertIn('# TYPE latency_seconds histogram', text)
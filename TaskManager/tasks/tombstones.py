@@ -0,0 +1,47 @@
+"""
+Tombstones for the changes feed (`/api/tasks/changes/`).
+
+The feed reports a soft-deleted task from its own row. A task that leaves a
+user's feed with no row left to report it is recorded as a `TaskTombstone`
+instead:
+
+- deleted outright, through the Task `post_delete` signal;
+- moved to the archive by `manage.py archive_tasks`;
+- reassigned to another user, by each reassignment path, for the previous
+  owner only. Admins see every task, so their feed skips these.
+
+Tombstones are kept for `TASK_TOMBSTONE_RETENTION_DAYS`. The feed answers
+410 Gone to a sync token older than that, as deletions since then may be
+lost, and the client must sync again from scratch. `manage.py
+archive_tasks` prunes expired tombstones.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TaskTombstone
+
+
+def _tombstones(tasks, reassigned):
+    return [TaskTombstone(task_id=task_id, user_id=user_id, reassigned=reassigned) for task_id, user_id in tasks]
+
+
+def record_tombstones(tasks, reassigned=False):
+    """Record that each `(task_id, user_id)` of `tasks` left that user's feed."""
+    TaskTombstone.objects.bulk_create(_tombstones(tasks, reassigned))
+
+
+async def arecord_tombstones(tasks, reassigned=False):
+    await TaskTombstone.objects.abulk_create(_tombstones(tasks, reassigned))
+
+
+def tombstone_horizon():
+    """Tombstones older than this may have been pruned."""
+    return timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention period; returns how many."""
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+    return deleted
@@ -1,10 +1,19 @@
 from django.urls import path, include
-from .views import TaskViewSet
+from django.views.decorators.csrf import csrf_exempt
+from .views import ArchivedTaskViewSet, TaskViewSet
+from .batch import BatchView
+from .async_views import TaskListAsyncView, TaskDetailAsyncView, TaskEventStreamView
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
+router.register(r'archived-tasks', ArchivedTaskViewSet, basename='archived-task')
 
 urlpatterns = [
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/', include(router.urls)),
-]
\ No newline at end of file
+    # Token authenticated, so exempt from CSRF like DRF's APIView
+    path('api/async/tasks/', csrf_exempt(TaskListAsyncView.as_view()), name='task-async-list'),
+    path('api/async/tasks/<int:pk>/', csrf_exempt(TaskDetailAsyncView.as_view()), name='task-async-detail'),
+    path('api/async/tasks/events/', TaskEventStreamView.as_view(), name='task-events'),
+]
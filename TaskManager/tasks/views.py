@@ -1,28 +1,57 @@
-from .models import Task, CustomUser
-from .serializers import TaskSerializer
+from .models import ArchivedTask, Task, CustomUser, TaskTombstone
+from .serializers import ArchivedTaskSerializer, TaskReadSerializer, TaskSerializer, parse_fields
 from rest_framework import serializers
 from rest_framework.response import Response
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
 from .permissions import IsAdminOrOwner
-from rest_framework.pagination import PageNumberPagination
+from .pagination import TaskPagination, decode_sync_token, encode_sync_token
+from .archive import restore_archived_tasks
+from .cache import get_list_cache, get_list_cache_key, get_scope, get_version, invalidate_task_lists
+from .conditional import list_validators, not_modified, set_validators, task_validators
+from .events import publish_task_events
+from .export import EXPORT_COLUMNS, EXPORT_FORMATS, EXPORT_RENDERERS, ExportRenderer, stream_rows
+from .search import search_tasks
+from .stats import apply_summary_deltas, changed_deltas, created_deltas, get_task_stats
+from .tombstones import record_tombstones, tombstone_horizon
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from TaskManager.db_routers import start_replica_reads, stop_replica_reads
 import django_filters
+from collections import Counter
+from operator import itemgetter
+from datetime import timedelta
+
+
+class StatusInFilter(django_filters.BaseInFilter, django_filters.ChoiceFilter):
+    """Comma separated statuses, each validated against Task.STATUS_CHOICES."""
 
 
 class TaskFilter(django_filters.FilterSet):
-    status = django_filters.CharFilter(field_name='status', lookup_expr='icontains')
+    # Exact matches only, so the (status, due_date) indexes can be used.
+    # `distinct=False`: the OR of repeated ?status= values never duplicates rows.
+    status = django_filters.MultipleChoiceFilter(
+        field_name='status', choices=Task.STATUS_CHOICES, distinct=False
+    )
+    status__in = StatusInFilter(field_name='status', lookup_expr='in', choices=Task.STATUS_CHOICES)
     due_date = django_filters.DateFilter(field_name='due_date', lookup_expr='exact')
-    
+    due_date_after = django_filters.DateFilter(field_name='due_date', lookup_expr='gte')
+    due_date_before = django_filters.DateFilter(field_name='due_date', lookup_expr='lte')
+    # Full-text search through the text index; orders by relevance (see tasks.search)
+    search = django_filters.CharFilter(method='filter_search', max_length=200)
+
     class Meta:
         model = Task
-        fields = ['status', 'due_date']
+        fields = ['status', 'status__in', 'due_date', 'due_date_after', 'due_date_before', 'search']
 
-
-class TaskPagination(PageNumberPagination):
-    page_size = 5
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+    def filter_search(self, queryset, name, value):
+        return search_tasks(queryset, value)
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -31,13 +60,44 @@ class TaskViewSet(viewsets.ModelViewSet):
     pagination_class = TaskPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = TaskFilter
+    bulk_max_items = 1000
+    export_chunk_size = 2000
+    changes_page_size = 100
+    changes_max_page_size = 1000
+    # Sync tokens never move past now - lag, so writes that commit slightly
+    # out of updated_at order are still picked up (possibly twice).
+    changes_sync_lag = timedelta(seconds=5)
+    # Writes also keep the summary, list caches, tombstones and events in
+    # step: a fixed handful of queries above the default budget. Bulk writes
+    # add one summary UPDATE per distinct delta.
+    query_budgets = {
+        'update': 20, 'partial_update': 20,
+        'bulk_create': 40, 'bulk_update': 40, 'bulk_destroy': 40,
+        'export': 20,
+    }
+    # Read from a replica unless the caller's scope recently saw a write
+    replica_actions = {'list', 'retrieve'}
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_token = start_replica_reads(get_scope(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        stop_replica_reads(self._replica_token)
+        self._replica_token = None
+        if isinstance(response, Response) and isinstance(getattr(request, 'accepted_renderer', None), ExportRenderer):
+            # Only the export stream is CSV or NDJSON; its errors are JSON labelled as such
+            request.accepted_renderer, request.accepted_media_type = JSONRenderer(), JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
 
     def get_queryset(self):
         """Admin sees all tasks; regular users see only their tasks."""
         user = self.request.user
         if user.role == 'admin':
             return Task.objects.filter(is_active=True)
-        return Task.objects.filter(user=user, is_active=True)
+        return Task.objects.filter(user_id=user.id, is_active=True)
 
     def perform_create(self, serializer):
         """Admin can create tasks for any user; regular users only for themselves."""
@@ -48,21 +108,51 @@ class TaskViewSet(viewsets.ModelViewSet):
             if assigned_user:
                 serializer.save(user_id=assigned_user)
             else:
-                serializer.save(user=user)
+                serializer.save(user_id=user.id)
         else:
             # Regular users cannot specify another user in the payload
             if "user" in self.request.data and self.request.data["user"] != str(user.id):
                 raise serializers.ValidationError(
                     {"detail": "You are not authorized to create tasks for another user."}
                 )
-            serializer.save(user=user)
+            serializer.save(user_id=user.id)
 
 
+    def list(self, request, *args, **kwargs):
+        """
+        Serve list pages from the per-user versioned cache when possible, and
+        answer 304 when the client's ETag still matches. The ETag comes from
+        the cache version, so a 304 costs no query even on a cache miss.
+        Misses select only the `?fields=` columns and skip model instances.
+        """
+        fields = parse_fields(request.query_params)
+        # Read once: a write committed after this point bumps the version,
+        # so the page and tag computed below are never served for it.
+        version = get_version(get_scope(request.user))
+        etag, last_modified = list_validators(request, version)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        cache = get_list_cache()
+        cache_key = get_list_cache_key(request, version)
+        data = cache.get(cache_key)
+        if data is not None:
+            return set_validators(Response(data), etag, last_modified)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = TaskReadSerializer(fields)
+        page = self.paginate_queryset(queryset.values(*serializer.columns))
+        response = self.get_paginated_response(serializer.to_representation(page))
+        cache.set(cache_key, response.data)
+        return set_validators(response, etag, last_modified)
+
     def create(self, request, *args, **kwargs):
         """Custom response for task creation."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
+        publish_task_events('task.created', [serializer.data])
         return Response(
             {"detail": "Task created successfully.", "task": serializer.data},
             status=status.HTTP_201_CREATED,
@@ -71,9 +161,10 @@ class TaskViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         """Allow regular users to update only their own tasks, and admins to reassign tasks."""
         instance = self.get_object()
+        previous_user_id = instance.user_id
 
         # Check if the user is authorized to update the task
-        if request.user.role != 'admin' and instance.user != request.user:
+        if request.user.role != 'admin' and instance.user_id != request.user.id:
             return Response(
                 {"detail": "You are not authorized to update this task."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -89,10 +180,11 @@ class TaskViewSet(viewsets.ModelViewSet):
             # Admin can update the `user` field to reassign the task
             new_user_id = request.data.get('user')
             if new_user_id:
-                try:
-                    new_user = CustomUser.objects.get(id=new_user_id)
-                    instance.user = new_user
-                except CustomUser.DoesNotExist:
+                # Only the id is needed, not the whole CustomUser row
+                new_user_pk = CustomUser.objects.filter(id=new_user_id).values_list('id', flat=True).first()
+                if new_user_pk is not None:
+                    instance.user_id = new_user_pk
+                else:
                     return Response(
                         {"detail": f"User with id {new_user_id} does not exist."},
                         status=status.HTTP_400_BAD_REQUEST,
@@ -100,6 +192,13 @@ class TaskViewSet(viewsets.ModelViewSet):
 
         # Save other updated fields
         self.perform_update(serializer)
+        previous_owners = {}
+        if instance.user_id != previous_user_id:
+            # The save signal only knows the new owner
+            invalidate_task_lists([previous_user_id])
+            record_tombstones([(instance.pk, previous_user_id)], reassigned=True)
+            previous_owners[instance.pk] = previous_user_id
+        publish_task_events('task.updated', [serializer.data], previous_owners)
 
         return Response(
             {"detail": "Task updated successfully.", "task": serializer.data},
@@ -117,7 +216,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             )
 
         # Check if the user is authorized to delete this task
-        if request.user.role != 'admin' and task.user != request.user:
+        if request.user.role != 'admin' and task.user_id != request.user.id:
             return Response(
                 {"detail": "You are not authorized to delete this task."},
                 status=status.HTTP_401_UNAUTHORIZED,
@@ -126,6 +225,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         # Perform soft delete (mark as inactive)
         task.is_active = False
         task.save()
+        publish_task_events('task.deactivated', [{"id": task.pk, "user": task.user_id}])
         return Response(
             {"detail": "Task marked as inactive."},
             status=status.HTTP_204_NO_CONTENT,
@@ -133,9 +233,10 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         """Admin can view any task; regular users can view only their tasks."""
+        fields = parse_fields(request.query_params)
         try:
             # Fetch the task without applying user-specific filters
-            task = Task.objects.get(pk=kwargs["pk"], is_active=True)
+            task = self._narrow_to_fields(Task.objects.all(), fields).get(pk=kwargs["pk"], is_active=True)
         except Task.DoesNotExist:
             return Response(
                 {"detail": "Task not found or it is no longer active."},
@@ -143,14 +244,373 @@ class TaskViewSet(viewsets.ModelViewSet):
             )
 
         # Check if the user is authorized to view this task
-        if request.user.role != 'admin' and task.user != request.user:
+        if request.user.role != 'admin' and task.user_id != request.user.id:
             return Response(
                 {"detail": "You are not authorized to view this task."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        serializer = self.get_serializer(task)
-        return Response(
+        etag, last_modified = task_validators(request, task)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(task, fields=fields)
+        response = Response(
             {"detail": "Task retrieved successfully.", "task": serializer.data},
             status=status.HTTP_200_OK,
-        )
\ No newline at end of file
+        )
+        return set_validators(response, etag, last_modified)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """Create many tasks in one INSERT; invalid items are reported and skipped."""
+        items = self._get_bulk_items(request.data)
+        existing_user_ids = self._get_existing_user_ids(items)
+
+        tasks, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "errors": {"detail": "Expected a task object."}})
+                continue
+
+            user_id, detail = self._resolve_task_user(item.get("user"), existing_user_ids)
+            if detail:
+                errors.append({"index": index, "errors": {"detail": detail}})
+                continue
+
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+            tasks.append(Task(**serializer.validated_data, user_id=user_id))
+
+        with transaction.atomic():
+            created = Task.objects.bulk_create(tasks)
+            apply_summary_deltas(created_deltas(created))
+            invalidate_task_lists({task.user_id for task in created})
+            data = self.get_serializer(created, many=True).data
+            publish_task_events('task.created', data)
+
+        return Response(
+            {
+                "detail": f"{len(created)} task(s) created.",
+                "tasks": data,
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        """Partially update many tasks in one UPDATE; each item must carry its `id`."""
+        items = self._get_bulk_items(request.data)
+        ids = [item.get("id") for item in items if isinstance(item, dict)]
+        # Scoped like get_queryset, so regular users can only reach their own tasks.
+        instances = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        existing_user_ids = self._get_existing_user_ids(items)
+
+        now = timezone.now()
+        updated, fields, errors = {}, {'updated_at'}, []
+        previous_owners = {}
+        for index, item in enumerate(items):
+            pk = item.get("id") if isinstance(item, dict) else None
+            instance = instances.get(pk) if isinstance(pk, int) else None
+            if instance is None:
+                errors.append({"index": index, "errors": {"detail": "Task not found or it is no longer active."}})
+                continue
+
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+
+            # Admin can update the `user` field to reassign the task
+            if request.user.role == 'admin' and item.get("user"):
+                user_id, detail = self._resolve_task_user(item["user"], existing_user_ids)
+                if detail:
+                    errors.append({"index": index, "errors": {"detail": detail}})
+                    continue
+                previous_owners.setdefault(instance.pk, instance.user_id)
+                instance.user_id = user_id
+                fields.add('user')
+
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+            instance.updated_at = now
+            updated[instance.pk] = instance
+
+        with transaction.atomic():
+            Task.objects.bulk_update(updated.values(), sorted(fields))
+            apply_summary_deltas(changed_deltas(updated.values()))
+            invalidate_task_lists({*previous_owners.values(), *(instance.user_id for instance in updated.values())})
+            record_tombstones(
+                ((pk, user_id) for pk, user_id in previous_owners.items() if updated[pk].user_id != user_id),
+                reassigned=True,
+            )
+            data = self.get_serializer(list(updated.values()), many=True).data
+            publish_task_events('task.updated', data, previous_owners)
+
+        return Response(
+            {
+                "detail": f"{len(updated)} task(s) updated.",
+                "tasks": data,
+                "errors": errors,
+            },
+            status=status.HTTP_200_OK if updated else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        """Soft delete many tasks, given as `{"ids": [...]}`, with a single UPDATE."""
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        ids = self._get_bulk_items(ids)
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=[pk for pk in ids if isinstance(pk, int)])
+            rows = list(queryset.select_for_update().values_list('pk', 'user_id', 'due_date', 'status'))
+            now = timezone.now()
+            changed = Task.objects.filter(pk__in=[row[0] for row in rows], is_active=True)
+            if changed.update(is_active=False, updated_at=now) != len(rows):
+                # Some were deactivated since the read (SQLite ignores FOR UPDATE);
+                # only the rows this UPDATE changed carry its timestamp
+                rows = list(
+                    Task.objects.filter(pk__in=[row[0] for row in rows], is_active=False, updated_at=now)
+                    .values_list('pk', 'user_id', 'due_date', 'status')
+                )
+            found = {row[0] for row in rows}
+
+            deltas = Counter()
+            for _, user_id, due_date, task_status in rows:
+                deltas[(user_id, due_date, task_status, True)] -= 1
+                deltas[(user_id, due_date, task_status, False)] += 1
+            apply_summary_deltas(deltas)
+            invalidate_task_lists({row[1] for row in rows})
+            publish_task_events('task.deactivated', [{"id": row[0], "user": row[1]} for row in rows])
+
+        errors = [
+            {"index": index, "errors": {"detail": "Task not found or it is no longer active."}}
+            for index, pk in enumerate(ids) if not isinstance(pk, int) or pk not in found
+        ]
+        return Response(
+            {"detail": f"{len(found)} task(s) marked as inactive.", "ids": sorted(found), "errors": errors},
+            status=status.HTTP_200_OK if found else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(
+        detail=False, methods=['get'],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, *EXPORT_RENDERERS],
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Stream every task in scope, after TaskFilter, as CSV or NDJSON:
+        `?export_format=csv|ndjson`, else the format negotiated from the
+        Accept header, else CSV. Rows are read in chunks, so memory stays
+        flat regardless of the number of tasks.
+        """
+        export_format = request.query_params.get('export_format')
+        if export_format is None:
+            negotiated = request.accepted_renderer.format
+            export_format = negotiated if negotiated in EXPORT_FORMATS else 'csv'
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by('due_date', 'id')
+        rows = queryset.values_list(*EXPORT_COLUMNS).iterator(chunk_size=self.export_chunk_size)
+
+        content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream_rows(export_format, rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="tasks.{extension}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """
+        Task counts from the summary table: the caller's own tasks, or for
+        admins every user's tasks (or one user's with `?user=<id>`).
+        """
+        user_id = request.user.id
+        if request.user.role == 'admin':
+            user_id = request.query_params.get('user') or None
+            if user_id is not None and not str(user_id).isdigit():
+                return Response({"detail": "user must be a user id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {"detail": "Task statistics retrieved successfully.", "stats": get_task_stats(user_id)},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request, *args, **kwargs):
+        """
+        Tasks created, updated or deleted since `?since=<sync_token>`, oldest
+        change first; omit `since` for an initial full sync. Soft-deleted
+        tasks, and tasks deleted, archived or reassigned away from the caller
+        (see tasks.tombstones), are returned as `{"id": ..., "deleted": true}`.
+        Tokens older than the tombstone retention are answered with 410.
+        """
+        fields = parse_fields(request.query_params)
+        if fields is not None and 'id' not in fields:
+            fields = ['id', *fields]
+
+        user = request.user
+        if user.role == 'admin':
+            queryset = Task.objects.all()
+            # Admins see every task, so a reassignment removes nothing
+            tombstones = TaskTombstone.objects.filter(reassigned=False)
+        else:
+            queryset = Task.objects.filter(user_id=user.id)
+            tombstones = TaskTombstone.objects.filter(user_id=user.id)
+
+        cutoff = (timezone.now() - self.changes_sync_lag, 0)
+        # An initial sync has nothing to remove from before it started
+        since, tombstone_since = None, cutoff
+        if request.query_params.get('since'):
+            try:
+                since, tombstone_since = decode_sync_token(request.query_params['since'])
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            if tombstone_since[0] < tombstone_horizon():
+                return Response(
+                    {"detail": "Sync token has expired; sync again without since."},
+                    status=status.HTTP_410_GONE,
+                )
+            updated_at, pk = since
+            # The plain lower bound lets the index range-scan from the token onwards
+            queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(id__gt=pk), updated_at__gte=updated_at)
+        deleted_at, tombstone_pk = tombstone_since
+        tombstones = tombstones.filter(Q(deleted_at__gt=deleted_at) | Q(id__gt=tombstone_pk), deleted_at__gte=deleted_at)
+
+        limit = self._get_changes_page_size(request)
+        serializer = TaskReadSerializer(fields)
+        rows = list(
+            queryset.order_by('updated_at', 'id')
+            .values(*serializer.columns, 'updated_at', 'is_active')[:limit + 1]
+        )
+        removed = list(tombstones.order_by('deleted_at', 'id').values('id', 'task_id', 'deleted_at')[:limit + 1])
+        # One stream in time order; a task sorts before a tombstone of the same instant
+        merged = sorted(
+            [
+                ((row['updated_at'], 0, row['id']), {**item, 'deleted': False} if row['is_active'] else
+                 {'id': row['id'], 'deleted': True})
+                for row, item in zip(rows, serializer.to_representation(rows))
+            ] + [((row['deleted_at'], 1, row['id']), {'id': row['task_id'], 'deleted': True}) for row in removed],
+            key=itemgetter(0),
+        )
+        has_more = len(merged) > limit
+        merged = merged[:limit]
+
+        position, tombstone_position = since, tombstone_since
+        for (at, kind, pk), _ in merged:
+            if kind == 0:
+                position = (at, pk)
+            else:
+                tombstone_position = (at, pk)
+        if not has_more:
+            position = self._settle_position(position, since, cutoff)
+            tombstone_position = self._settle_position(tombstone_position, tombstone_since, cutoff)
+        elif position is None:
+            # Only tombstones so far: every task up to the last one was sent
+            position = (merged[-1][0][0], 0)
+        return Response(
+            {
+                "detail": "Task changes retrieved successfully.",
+                "changes": [change for _, change in merged],
+                "sync_token": encode_sync_token(position, tombstone_position),
+                "has_more": has_more,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @staticmethod
+    def _settle_position(position, since, cutoff):
+        """Once caught up, a position never moves past the lag cutoff, nor back behind `since`."""
+        if position is None or position > cutoff:
+            return max(since, cutoff) if since else cutoff
+        return position
+
+    def _narrow_to_fields(self, queryset, fields):
+        """Load only the requested columns, plus those retrieve needs for checks and validators."""
+        if fields is None:
+            return queryset
+        columns = ['user_id' if name == 'user' else name for name in fields]
+        return queryset.only(*columns, 'user_id', 'updated_at')
+
+    def _get_changes_page_size(self, request):
+        try:
+            page_size = int(request.query_params['page_size'])
+        except (KeyError, ValueError):
+            return self.changes_page_size
+        if page_size <= 0:
+            return self.changes_page_size
+        return min(page_size, self.changes_max_page_size)
+
+    def _get_bulk_items(self, data):
+        if not isinstance(data, list) or not data:
+            raise serializers.ValidationError({"detail": "Expected a non-empty list."})
+        if len(data) > self.bulk_max_items:
+            raise serializers.ValidationError(
+                {"detail": f"A bulk request may contain at most {self.bulk_max_items} items."}
+            )
+        return data
+
+    def _get_existing_user_ids(self, items):
+        """Look up every user referenced by an admin's payload with a single query."""
+        if self.request.user.role != 'admin':
+            return set()
+        requested = set()
+        for item in items:
+            if isinstance(item, dict) and item.get("user"):
+                try:
+                    requested.add(int(item["user"]))
+                except (TypeError, ValueError):
+                    pass
+        return set(CustomUser.objects.filter(id__in=requested).values_list('id', flat=True))
+
+    def _resolve_task_user(self, requested_user, existing_user_ids):
+        """Apply the perform_create assignment rule to one item; return (user_id, error)."""
+        user = self.request.user
+        if user.role != 'admin':
+            if requested_user not in (None, "") and str(requested_user) != str(user.id):
+                return None, "You are not authorized to create tasks for another user."
+            return user.id, None
+
+        if not requested_user:
+            return user.id, None
+        try:
+            user_id = int(requested_user)
+        except (TypeError, ValueError):
+            user_id = None
+        if user_id not in existing_user_ids:
+            return None, f"User with id {requested_user} does not exist."
+        return user_id, None
+
+
+class ArchivedTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """Tasks moved out by `archive_tasks`: admins see all, regular users their own."""
+    serializer_class = ArchivedTaskSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrOwner]
+    pagination_class = TaskPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'admin':
+            return ArchivedTask.objects.all()
+        return ArchivedTask.objects.filter(user_id=user.id)
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, *args, **kwargs):
+        """Move the task back into the tasks table, active again."""
+        archived = self.get_object()
+        restored = restore_archived_tasks(ArchivedTask.objects.filter(pk=archived.pk))
+        if not restored:
+            # Restored concurrently
+            return Response({"detail": "Archived task not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {"detail": "Task restored successfully.", "task": TaskSerializer(restored[0]).data},
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from TaskManager.db_routers import PRIMARY, get_replicas, replica_reads
+
+from .models import CustomUser
+
+_MISSING = object()
+
+
+class ClaimsUser(TokenUser):
+    """Stateless user built from token claims, exposing `role` like CustomUser."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+
+class UserStateCache:
+    """
+    Small thread-safe LRU of `user_id -> (is_active, role, password)` whose
+    entries expire after `ttl` seconds. `None` is cached for unknown users.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, ttl):
+        state = self._lookup(user_id)
+        if state is _MISSING:
+            with replica_reads(f'user:{user_id}'):
+                state = self._queryset(user_id).first()
+            if state is None and get_replicas():
+                # Possibly a new user the replica has not caught up with yet
+                state = self._queryset(user_id).using(PRIMARY).first()
+            self._store(user_id, state, ttl)
+        return state
+
+    async def aget(self, user_id, ttl):
+        state = self._lookup(user_id)
+        if state is _MISSING:
+            with replica_reads(f'user:{user_id}'):
+                state = await self._queryset(user_id).afirst()
+            if state is None and get_replicas():
+                state = await self._queryset(user_id).using(PRIMARY).afirst()
+            self._store(user_id, state, ttl)
+        return state
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _queryset(self, user_id):
+        return CustomUser.objects.filter(pk=user_id).values_list('is_active', 'role', 'password')
+
+    def _lookup(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return _MISSING
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def _store(self, user_id, state, ttl):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+user_state_cache = UserStateCache()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the user from the token's `role` claim
+    instead of loading `CustomUser` on every request.
+
+    Tokens issued without a `role` claim fall back to the database lookup.
+    When `JWT_USER_CHECK_TTL` is non-zero, the user's `is_active` and `role`
+    are re-read from the database at most once per TTL per process, so
+    deactivation and role changes still take effect within that window.
+
+    `aauthenticate` is the equivalent for plain Django async views, which
+    DRF does not serve.
+    """
+
+    def get_user(self, validated_token):
+        if not self._has_claims(validated_token):
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        ttl = getattr(settings, 'JWT_USER_CHECK_TTL', 0)
+        if not ttl:
+            return user
+        return self._apply_state(user, user_state_cache.get(user.id, ttl), validated_token)
+
+    async def aauthenticate(self, request):
+        """Return `(user, token)` for a Django `HttpRequest`, or `None` without credentials."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if not self._has_claims(validated_token):
+            try:
+                user_id = validated_token[api_settings.USER_ID_CLAIM]
+            except KeyError:
+                raise InvalidToken(_("Token contained no recognizable user identification"))
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self._check_user(user.is_active, user.password, validated_token)
+            return user
+
+        user = ClaimsUser(validated_token)
+        ttl = getattr(settings, 'JWT_USER_CHECK_TTL', 0)
+        if not ttl:
+            return user
+        return self._apply_state(user, await user_state_cache.aget(user.id, ttl), validated_token)
+
+    def _has_claims(self, validated_token):
+        return 'role' in validated_token and api_settings.USER_ID_CLAIM in validated_token
+
+    def _apply_state(self, user, state, validated_token):
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, role, password = state
+        self._check_user(is_active, password, validated_token)
+
+        # The database is fresher than the claim if the role changed since issue
+        user.role = role
+        return user
+
+    def _check_user(self, is_active, password, validated_token):
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
@@ -1,6 +1,8 @@
 from .models import CustomUser
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .tokens import RoleRefreshToken
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -47,4 +49,9 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         """Create a new user with a hashed password."""
         validated_data.pop('password_confirmation')  # Remove password_confirmation
         validated_data['password'] = make_password(validated_data['password'])
-        return CustomUser.objects.create(**validated_data)
\ No newline at end of file
+        return CustomUser.objects.create(**validated_data)
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issue token pairs carrying the user's role (see ClaimsJWTAuthentication)."""
+    token_class = RoleRefreshToken
@@ -1,8 +1,13 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from users.authentication import user_state_cache
 from users.models import CustomUser
+from users.tokens import RoleRefreshToken
 
 User = get_user_model()
 
@@ -108,3 +113,60 @@ class UserViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("email", response.data)
 
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        user_state_cache.clear()
+        self.admin_user = User.objects.create_user(
+            username="admin", email="admin@example.com", password="adminpass", role="admin"
+        )
+        self.admin_user_token = str(RoleRefreshToken.for_user(self.admin_user).access_token)
+
+    def test_token_obtain_includes_role_claim(self):
+        response = self.client.post("/api/token/", {"username": "admin", "password": "adminpass"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data["access"])["role"], "admin")
+
+    def test_registration_token_includes_role_claim(self):
+        data = {
+            "username": "newuser",
+            "email": "newuser@example.com",
+            "password": "securepassword123",
+            "password_confirmation": "securepassword123"
+        }
+        response = self.client.post('/api/users/register_user/', data)
+        self.assertEqual(AccessToken(response.data["token"]["access"])["role"], "regular")
+
+    @override_settings(JWT_USER_CHECK_TTL=0)
+    def test_role_claim_skips_user_lookup(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.admin_user_token}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('users_customuser' in query['sql'] for query in queries.captured_queries))
+
+    @override_settings(JWT_USER_CHECK_TTL=30)
+    def test_user_check_is_cached_between_requests(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.admin_user_token}")
+        self.client.get("/api/tasks/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('users_customuser' in query['sql'] for query in queries.captured_queries))
+
+    @override_settings(JWT_USER_CHECK_TTL=30)
+    def test_inactive_user_rejected(self):
+        self.admin_user.is_active = False
+        self.admin_user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.admin_user_token}")
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_USER_CHECK_TTL=30)
+    def test_role_change_overrides_claim(self):
+        self.admin_user.role = "regular"
+        self.admin_user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.admin_user_token}")
+        response = self.client.post("/api/users/create_user/", {})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,11 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token carrying the user's `role` claim, which its access tokens inherit."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        return token
@@ -1,5 +1,5 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RoleRefreshToken
 from .serializers import UserCreateSerializer, UserRegisterSerializer
 from rest_framework.response import Response
 from rest_framework import status
@@ -24,12 +24,13 @@ def registration_view(request):
     serializer = UserRegisterSerializer(data=request.data)
     if serializer.is_valid():
         account = serializer.save()
+        refresh = RoleRefreshToken.for_user(account)
         data = {
             "username": account.username,
             "email": account.email,
             "token": {
-                "refresh": str(RefreshToken.for_user(account)),
-                "access": str(RefreshToken.for_user(account).access_token),
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
             },
         }
         return Response(data, status=status.HTTP_201_CREATED)